@@ -1,12 +1,30 @@
 # FUNCTIONS FOR PROCESSING A TREEBANK FILE IN CONLLU FORMAT
 
 
+import MAL_columnar_treebank
+
+
+# UD dependency relations of clausal heads (part of the key of the cached treebanks)
+CLAUSAL_TAGS = ['root', 'csubj', 'csubj:pass', 'ccomp', 'xcomp', 'advcl', 'acl', 'acl:relcl', 'parataxis']
+
 class Treebank:
 
     def __init__(self):
         self.sentence_list = []
 
 
+class StreamedTreebank:
+    """treebank which does not keep sentences in memory,
+       every iteration over sentence_list re-reads the conllu file and yields fully linked sentences one by one"""
+
+    def __init__(self, filename):
+        self.filename = filename
+
+    @property
+    def sentence_list(self):
+        return iterate_sentences(self.filename)
+
+
 class Sentence:
 
     def __init__(self):
@@ -14,6 +32,8 @@ class Sentence:
         self.text = None
         self.root = None
         self.word_list = []
+        self.preorder_list = []  # nodes in DFS preorder, i.e. each subtree is a contiguous interval
+        self.length_prefix = [0]  # prefix sums of form lengths along preorder_list
 
 
 class Word:
@@ -33,7 +53,18 @@ class Word:
         self.comment = None
         self.next_node = None
         self.direct_children = []
-        self.all_children = []
+        self.sentence = None
+        self.preorder_index = None  # position in sentence.preorder_list
+        self.subtree_size = 0  # number of all children, i.e. nodes directly and indirectly dependent on the word
+
+    @property
+    def all_children(self):
+        """returns all nodes directly and indirectly dependent on the word in the order of their IDs"""
+
+        start = self.preorder_index + 1
+        all_children = self.sentence.preorder_list[start:start + self.subtree_size]
+
+        return sorted(all_children, key=lambda word_node: word_node.id)
 
 
 def create_worddata(a_line):
@@ -76,83 +107,181 @@ def load_treebank(filename):
     return a_treebank
 
 
+def assign_next_node_in_sentence(a_sentence):
+    """adds a next node to word data of a single sentence"""
+
+    for _ in range(len(a_sentence.word_list) - 1):
+        a_sentence.word_list[_].next_node = a_sentence.word_list[_ + 1]
+
+        if (a_sentence.word_list[_].id + 1) != a_sentence.word_list[_ + 1].id:
+            raise ValueError('ERROR!')
+
+    return a_sentence
+
+
 def assign_next_node(a_treebank):
     """adds a next node to word data"""
 
     for sentence in a_treebank.sentence_list:
-        for _ in range(len(sentence.word_list) - 1):
-            sentence.word_list[_].next_node = sentence.word_list[_ + 1]
-
-            if (sentence.word_list[_].id + 1) != sentence.word_list[_ + 1].id:
-                raise ValueError('ERROR!')
+        assign_next_node_in_sentence(sentence)
 
     return a_treebank
 
 
+def find_parent_and_children_in_sentence(a_sentence):  # NOTE: root parent is None!
+    """interlinks the data of a single sentence based on the parent-child relationship"""
+
+    for word in a_sentence.word_list:
+        if word.parentID != 0 and word.deprel != 'punct':
+            word.parent = a_sentence.word_list[word.parentID - 1]  # assign a parent in the form of a word class
+            word.parent.direct_children.append(word)  # add a child to its parent
+        else:
+            a_sentence.root = word
+
+    return a_sentence
+
+
 def find_parent_and_children(a_treebank):  # NOTE: root parent is None!
     """interlinks the data based on the parent-child relationship"""
 
     for sentence in a_treebank.sentence_list:
-        for word in sentence.word_list:
-            if word.parentID != 0 and word.deprel != 'punct':
-                word.parent = sentence.word_list[word.parentID - 1]  # assign a parent in the form of a word class
-                word.parent.direct_children.append(word)  # add a child to its parent
-            else:
-                sentence.root = word
+        find_parent_and_children_in_sentence(sentence)
 
     return a_treebank
 
 
-def add_word_to_all_parents(word, parent):
-    """adds a word to all their parents from the bottom to top of the treebank data structure"""
+def index_subtrees_in_sentence(a_sentence):
+    """orders the nodes of a single sentence in DFS preorder (one pass, no recursion), so that all children of a word
+       form the interval preorder_index + 1 .. preorder_index + subtree_size, and computes prefix sums of form lengths"""
+
+    a_sentence.preorder_list = []
+    a_sentence.length_prefix = [0]
+
+    for word in a_sentence.word_list:
+        word.sentence = a_sentence
+        if word.parent is None:  # root and punctuation marks start their own subtrees
+            stack = [word]
+            while stack:
+                node = stack.pop()
+                node.preorder_index = len(a_sentence.preorder_list)
+                a_sentence.preorder_list.append(node)
+                a_sentence.length_prefix.append(a_sentence.length_prefix[-1] + len(node.form))
+                stack.extend(reversed(node.direct_children))
 
-    if parent is not None:
-        parent.all_children.append(word)
-        add_word_to_all_parents(word, parent.parent)
+    if len(a_sentence.preorder_list) != len(a_sentence.word_list):
+        raise ValueError('ERROR! Sentence ' + str(a_sentence.id) + ' contains a cycle.')
 
+    for node in reversed(a_sentence.preorder_list):
+        node.subtree_size = 0
+        for child in node.direct_children:
+            node.subtree_size += child.subtree_size + 1
 
-def find_all_children(a_treebank):
-    """finds all nodes directly and indirectly dependent on a given word in the treebank data structure"""
+    return a_sentence
+
+
+def index_subtrees(a_treebank):
+    """indexes subtrees of all words in the treebank data structure"""
 
     for sentence in a_treebank.sentence_list:
-        for word in sentence.word_list:
-            if word.deprel != 'punct':
-                add_word_to_all_parents(word, word.parent)
+        index_subtrees_in_sentence(sentence)
 
     return a_treebank
 
 
-def tag_clause_head(a_treebank):
-    """adds a clausal comment to words which deprel is one of the below-mention UD dependency relations"""
+def count_all_children_length(word):
+    """counts characters of all children belonging to a given word using the prefix sums, i.e. in constant time"""
+
+    start = word.preorder_index + 1
+
+    return word.sentence.length_prefix[start + word.subtree_size] - word.sentence.length_prefix[start]
+
+
+def tag_clause_head_in_sentence(a_sentence):
+    """adds a clausal comment to words of a single sentence which deprel is one of CLAUSAL_TAGS"""
 
-    clausal_tags = ['root', 'csubj', 'csubj:pass', 'ccomp', 'xcomp', 'advcl', 'acl', 'acl:relcl', 'parataxis']
+    for word in a_sentence.word_list:
+        if word.deprel in CLAUSAL_TAGS:
+            word.comment = 'clause'
+
+    return a_sentence
+
+
+def tag_clause_head(a_treebank):
+    """adds a clausal comment to words which deprel is one of CLAUSAL_TAGS"""
 
     for sentence in a_treebank.sentence_list:
-        for word in sentence.word_list:
-            if word.deprel in clausal_tags:
-                word.comment = 'clause'
+        tag_clause_head_in_sentence(sentence)
 
     return a_treebank
 
 
+def tag_coordinate_clause_in_sentence(a_sentence):
+    """broadens clauses of a single sentence by conj which inherits the clausal comment if its parent is commented as 'clause'"""
+
+    for word in a_sentence.word_list:
+        if word.deprel == 'conj' and word.parent.comment == 'clause':
+            word.comment = 'clause'
+
+    return a_sentence
+
+
 def tag_coordinate_clause(a_treebank):
     """broadens clauses by conj which inherits the clausal comment if its parent is commented as 'clause'"""
 
     for sentence in a_treebank.sentence_list:
-        for word in sentence.word_list:
-            if word.deprel == 'conj' and word.parent.comment == 'clause':
-                word.comment = 'clause'
+        tag_coordinate_clause_in_sentence(sentence)
 
     return a_treebank
 
 
-def create_treebank(filename):
-    """combines all the functions and returns a complete treebank data structure"""
+def link_sentence(a_sentence):
+    """combines all the linking functions for a single sentence, i.e. the same steps as create_treebank"""
+
+    a_sentence = assign_next_node_in_sentence(a_sentence)
+    a_sentence = find_parent_and_children_in_sentence(a_sentence)
+    a_sentence = index_subtrees_in_sentence(a_sentence)
+    a_sentence = tag_clause_head_in_sentence(a_sentence)
+    a_sentence = tag_coordinate_clause_in_sentence(a_sentence)
+
+    return a_sentence
+
+
+def iterate_sentences(filename):
+    """opens conllu file and yields fully linked sentences one at a time,
+       i.e. only a single sentence is held in memory"""
+
+    a_sentence = None
+
+    with open(filename, mode='r', encoding='utf-8') as data:
+        for line in data:
+            if line.startswith('# sent_id'):  # sentence identification
+                if a_sentence is not None:
+                    yield link_sentence(a_sentence)
+                a_sentence = Sentence()
+                a_sentence.id = line.split('=')[1].strip()
+            if line.startswith('# text ='):  # text identification
+                a_sentence.text = line.strip()
+            if not line.startswith('#') and len(line) > 1:  # reads LF character too
+                a_sentence.word_list.append(create_worddata(line))
+
+    if a_sentence is not None:
+        yield link_sentence(a_sentence)
+
+
+def create_treebank(filename, streamed=False, cached=False):
+    """combines all the functions and returns a complete treebank data structure,
+       streamed=True returns a treebank which parses and links one sentence at a time instead,
+       cached=True returns a columnar treebank saved next to the input file and memory-mapped on repeat runs"""
+
+    if streamed:
+        return StreamedTreebank(filename)
+    if cached:
+        return MAL_columnar_treebank.load_cached_treebank(filename)
 
     a_treebank = load_treebank(filename)
     a_treebank = assign_next_node(a_treebank)
     a_treebank = find_parent_and_children(a_treebank)
-    a_treebank = find_all_children(a_treebank)
+    a_treebank = index_subtrees(a_treebank)
     a_treebank = tag_clause_head(a_treebank)
     a_treebank = tag_coordinate_clause(a_treebank)
 
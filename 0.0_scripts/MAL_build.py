@@ -0,0 +1,283 @@
+# INCREMENTAL BUILD: MEASURES, XFY, WEIGHTED XFY AND FITS AS NODES OF A DEPENDENCY GRAPH
+# each node is stamped by a key created from its parameters, content of its input files and the code which creates its outputs,
+# only nodes which key changed (or which outputs are missing) are processed again, e.g.
+# python MAL_build.py zh_pud-ud-test.conllu
+# python MAL_build.py zh_pud-ud-test.conllu --measures clause_word_character_cut word_character_component --limit 5 10
+# output files are created in the current directory (as by MAL_main), stamps are saved in STAMP_FILE
+
+
+import argparse
+import hashlib
+import json
+import os
+import MAL_UD_parser
+import MAL_columnar_treebank
+import MAL_engine as E
+import MAL_variants as V
+import MAL_word_level as W
+import MAL_character_level as C
+import MAL_character_table as CT
+import MAL_xfy as xfy
+import MAL_nlreg as nlr
+
+
+STAMP_FILE = 'MAL_build_stamps.json'
+
+SCRIPT_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+# modules which create outputs of the nodes of a given kind (changes in them make the nodes stale)
+CODE_MODULES = {'measure': ['MAL_UD_parser', 'MAL_columnar_treebank', 'MAL_engine', 'MAL_xfy', 'MAL_summary', 'MAL_syntactic_level',
+                            'MAL_word_level', 'MAL_character_level', 'MAL_character_table', 'MAL_word_character_processing',
+                            'MAL_word_pinyin_processing'],
+                'weighted': ['MAL_xfy'],
+                'fit': ['MAL_nlreg']}
+
+
+class Node:
+    """a step of the build:
+       kind == 'measure' (files of tokens/types and their xfy), 'weighted' (weighted xfy) or 'fit' (listings of both models),
+       name == a unique name of the node, input_files == files its outputs are created from,
+       parameters == everything else its outputs depend on (json serializable), output_files == files it creates,
+       dependencies == names of nodes creating its input files"""
+
+    def __init__(self, kind, name, input_files, parameters, output_files, dependencies=None):
+        self.kind = kind
+        self.name = name
+        self.input_files = input_files
+        self.parameters = parameters
+        self.output_files = output_files
+        self.dependencies = [] if dependencies is None else dependencies
+
+
+def hash_file(filename):
+    """returns a hash of content of a file"""
+
+    file_hash = hashlib.sha256()
+
+    with open(filename, mode='rb') as data:
+        for chunk in iter(lambda: data.read(1 << 20), b''):
+            file_hash.update(chunk)
+
+    return file_hash.hexdigest()
+
+
+def hash_code(kind):
+    """returns a hash of the source code of modules creating outputs of nodes of a given kind"""
+
+    return hashlib.sha256('|'.join([hash_file(os.path.join(SCRIPT_DIRECTORY, module + '.py'))
+                                    for module in CODE_MODULES[kind]]).encode('utf-8')).hexdigest()
+
+
+def create_node_key(node, code_hash_dict):
+    """returns a key of a node, i.e. a hash of its parameters, content of its input files and its code"""
+
+    key_data = [node.kind, node.name, node.parameters, [hash_file(filename) for filename in node.input_files], code_hash_dict[node.kind]]
+
+    return hashlib.sha256(json.dumps(key_data, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def create_graph(treebank_file, measure_names=None, limit_list=(10,), fit=True):
+    """returns nodes needed by given measures (all of them by default) in a topological order,
+       one weighted xfy file per limit (named as by E.export_measures), fit=False -> no fit nodes"""
+
+    if measure_names is None:
+        measure_names = list(V.ALL_MEASURES)
+
+    for measure_name in measure_names:
+        if measure_name not in V.ALL_MEASURES:
+            raise ValueError('ERROR! Unknown measure: ' + measure_name)
+
+    if len(limit_list) == 1:
+        suffix_list = ['_xfy_weighted']
+    else:
+        suffix_list = ['_xfy_weighted_' + str(limit) for limit in limit_list]
+
+    # the word and character levels depend on metadata about Chinese characters
+    character_files = [filename for filename in [CT.BLCU_FILE, CT.CHISE_FILE] if os.path.isfile(filename)]
+
+    node_list = []
+
+    for measure_name in measure_names:
+        measure = V.ALL_MEASURES[measure_name]
+        input_files = [treebank_file]
+        if measure_name in W.WORD_MEASURES or measure_name in C.CHARACTER_MEASURES:
+            input_files = input_files + character_files
+
+        # xfy files of tokens (+ types) of the measure
+        name_list = [measure.token_name] if measure.type_column is None else [measure.token_name, measure.type_name]
+        xfy_files = [measure.filename(a_name, '_xfy') for a_name in name_list]
+        node_list.append(Node('measure', measure_name, input_files, {'measure': measure_name},
+                              [measure.filename(a_name) for a_name in name_list] + xfy_files))
+
+        for a_name, xfy_file in zip(name_list, xfy_files):
+            fit_files = [xfy_file]
+            for limit, suffix in zip(limit_list, suffix_list):
+                weighted_file = measure.filename(a_name, suffix)
+                node_list.append(Node('weighted', weighted_file, [xfy_file], {'limit': limit}, [weighted_file], [measure_name]))
+                fit_files.append(weighted_file)
+
+            if fit:
+                for fit_file in fit_files:
+                    base = os.path.splitext(fit_file)[0]
+                    node_list.append(Node('fit', base + '_nlreg', [fit_file], {},
+                                          [base + '_' + model + '_nlreg.lst' for model in ['truncated', 'complete']],
+                                          [measure_name if fit_file == xfy_file else fit_file]))
+
+    return node_list
+
+
+def load_treebank(treebank_file, streamed=False, columnar=False, cached=False):
+    """creates a treebank data structure (see MAL_main.export_data)"""
+
+    if columnar:
+        return MAL_columnar_treebank.create_columnar_treebank(treebank_file)
+
+    return MAL_UD_parser.create_treebank(treebank_file, streamed, cached)
+
+
+def run_measure_nodes(node_list, treebank_options):
+    """processes all given measures during a single pass through the treebank (weighted xfy is left to the weighted nodes)"""
+
+    a_treebank = load_treebank(node_list[0].input_files[0], **treebank_options)
+    E.export_measures(a_treebank, None, [V.ALL_MEASURES[node.parameters['measure']] for node in node_list])
+
+
+def run_weighted_nodes(node_list, treebank_options):
+    """calculates weighted xfy of given nodes"""
+
+    for node in node_list:
+        xfy.calculate_weighted_xfy(node.input_files[0], node.output_files[0], node.parameters['limit'])
+
+
+def run_fit_nodes(node_list, treebank_options):
+    """fits both models to xfy of all given nodes at once, listings of empty xfy files are removed"""
+
+    filename_list = []
+
+    for node in node_list:
+        if len(nlr.load_xfy_file(node.input_files[0])) > 1:
+            filename_list.append(node.input_files[0])
+        else:
+            for output_file in node.output_files:
+                if os.path.isfile(output_file):
+                    os.remove(output_file)
+
+    if filename_list:
+        nlr.fit_nlreg_batch(filename_list)
+
+
+RUNNERS = {'measure': run_measure_nodes, 'weighted': run_weighted_nodes, 'fit': run_fit_nodes}
+
+
+def load_stamps(stamp_file):
+    """returns node name -> [key, output files] of the previous build"""
+
+    if not os.path.isfile(stamp_file):
+        return {}
+
+    with open(stamp_file, mode='r', encoding='utf-8') as data:
+        return json.load(data)
+
+
+def save_stamps(stamp_dict, stamp_file):
+    """saves stamps of the build (into a temporary file first, so that an interrupted run leaves no broken stamps)"""
+
+    with open(stamp_file + '.tmp', mode='w', encoding='utf-8') as output:
+        json.dump(stamp_dict, output, indent=1, sort_keys=True)
+
+    os.replace(stamp_file + '.tmp', stamp_file)
+
+
+def is_stale(node, key, stamp_dict):
+    """decides whether a node has to be processed, i.e. its key changed or some of its outputs are missing"""
+
+    if node.name not in stamp_dict or stamp_dict[node.name][0] != key:
+        return True
+
+    return not all(os.path.isfile(output_file) for output_file in stamp_dict[node.name][1])
+
+
+def build(node_list, treebank_options=None, stamp_file=STAMP_FILE, force=False, dry_run=False):
+    """processes stale nodes in waves: a wave == nodes which dependencies are done, stale nodes of the same kind
+       are processed together (e.g. all stale measures during a single pass through the treebank),
+       keys of nodes are created only after their dependencies are done, i.e. a node which inputs did not change is not
+       processed again even if its dependencies were, force=True -> all the nodes are processed,
+       dry_run=True -> nothing is processed (stale nodes are determined as if their dependencies did not change),
+       returns names of processed (stale) nodes"""
+
+    if treebank_options is None:
+        treebank_options = {}
+
+    stamp_dict = load_stamps(stamp_file)
+    code_hash_dict = {kind: hash_code(kind) for kind in CODE_MODULES}
+    done = set()
+    processed_list = []
+    waiting_list = list(node_list)
+
+    while waiting_list:
+        wave = [node for node in waiting_list if all(dependency in done for dependency in node.dependencies)]
+        if not wave:
+            raise ValueError('ERROR! Dependencies of nodes ' + ', '.join([node.name for node in waiting_list]) + ' cannot be met.')
+        waiting_list = [node for node in waiting_list if node not in wave]
+
+        for kind in ['measure', 'weighted', 'fit']:
+            stale_list = []
+            for node in wave:
+                if node.kind != kind:
+                    continue
+                key = None
+                if all(os.path.isfile(filename) for filename in node.input_files):
+                    key = create_node_key(node, code_hash_dict)
+                if force or key is None or is_stale(node, key, stamp_dict):
+                    stale_list.append([node, key])
+
+            if stale_list and not dry_run:
+                RUNNERS[kind]([node for node, key in stale_list], treebank_options)
+                for node, key in stale_list:
+                    if key is None:  # outputs of a dependency did not exist before
+                        key = create_node_key(node, code_hash_dict)
+                    stamp_dict[node.name] = [key, [filename for filename in node.output_files if os.path.isfile(filename)]]
+                save_stamps(stamp_dict, stamp_file)
+
+            processed_list.extend([node.name for node, key in stale_list])
+
+        done.update([node.name for node in wave])
+
+    return processed_list
+
+
+def main():
+    """command line interface of the build"""
+
+    parser = argparse.ArgumentParser(description='Incremental build of data quantification, xfy, weighted xfy and fits.')
+    parser.add_argument('treebank_file', nargs='?', help='CoNLL-U file of the treebank')
+    parser.add_argument('--measures', nargs='+', default=None, help='measures to be built (all of them by default)')
+    parser.add_argument('--limit', nargs='+', type=int, default=[10], help='limit(s) of weighted xfy (10 by default)')
+    parser.add_argument('--no-fit', action='store_true', help='models are not fitted')
+    parser.add_argument('--force', action='store_true', help='all the nodes are processed')
+    parser.add_argument('--dry-run', action='store_true', help='stale nodes are only listed')
+    parser.add_argument('--list', action='store_true', help='available measures are only listed')
+    parser.add_argument('--streamed', action='store_true', help='only one sentence is kept in memory at a time')
+    parser.add_argument('--columnar', action='store_true', help='the treebank is kept in compact NumPy arrays')
+    parser.add_argument('--cached', action='store_true', help='the columnar treebank is cached next to the treebank file')
+    parser.add_argument('--stamp-file', default=STAMP_FILE, help='file with stamps of the build')
+    args = parser.parse_args()
+
+    if args.list:
+        print('\n'.join(V.ALL_MEASURES))
+        return
+
+    if args.treebank_file is None:
+        parser.error('the treebank file is required')
+
+    node_list = create_graph(args.treebank_file, args.measures, args.limit, not args.no_fit)
+    processed_list = build(node_list, {'streamed': args.streamed, 'columnar': args.columnar, 'cached': args.cached},
+                           args.stamp_file, args.force, args.dry_run)
+
+    print(('Stale' if args.dry_run else 'Processed') + ' nodes: ' + str(len(processed_list)) + ' of ' + str(len(node_list)))
+    for name in processed_list:
+        print(name)
+
+
+if __name__ == '__main__':
+    main()
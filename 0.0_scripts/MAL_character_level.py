@@ -2,81 +2,65 @@
 # Triplet of character-component-stroke
 
 
-import pandas as pd
-import MAL_word_character_processing as CH
-import MAL_xfy as xfy
+import numpy as np
+import MAL_engine as E
+import MAL_character_table as CT
 
 
 # AUXILIARY FUNCTIONS
-def count_all_components(a_character, metadata_dict):
-    """recursively counts all components in a character, i.e. until each component cannot be decomposed further,
-       ==maximal decomposition"""
+def find_component_stroke_data(a_string, character_table, chise=False, max_decomposition=False):
+    """returns the numbers of components and strokes of all characters of a given string (0, 0 if not findable),
+       characters are looked up at once,
+       chise=True -> CHISE instead of BLCU as a source for components (BLCU is still a source for strokes)"""
 
-    component_n = 0
+    codes = character_table.codes(a_string)
 
-    for component in metadata_dict[a_character]['component']:
-        if component in metadata_dict and metadata_dict[component]['component_n'] > 1:
-            component_n += count_all_components(component, metadata_dict)
-        else:
-            component_n += 1
+    component_values = character_table.component_array(chise, max_decomposition)[codes].astype(np.int64)
+    stroke_values = character_table.stroke_n[codes].astype(np.int64)
 
-    return component_n
+    # CHISE source requires the character to be in BLCU as well
+    missing = (component_values == -1) | (stroke_values == -1)
 
+    component_values[missing] = 0
+    stroke_values[missing] = 0
 
-def find_component_stroke_data(a_character, metadata_dict_blcu, metadata_dict_chise):
-    """returns the number of component(s) and stroke(s) of a given character (if findable)"""
+    return [(int(component_n), int(stroke_n)) for component_n, stroke_n in zip(component_values, stroke_values)]
 
-    component_n = 0
-    stroke_n = 0
 
-    # if-block for BLCU source
-    if a_character in metadata_dict_blcu:
-        # component_n = count_all_components(a_character, metadata_dict_blcu)  # maximal decomposition
-        component_n = metadata_dict_blcu[a_character]['component_n']
-        stroke_n = metadata_dict_blcu[a_character]['stroke_n']
+# CORE FUNCTION
+# the measure consists of a function creating its rows for a given sentence and a function processing a whole treebank,
+# keyword arguments of the row function switch between variants of the measure (see MAL_variants)
+def character_component_stroke_rows(sentence, state, chise=False, max_decomposition=False):
+    """x==character length in the number of components, y==component length in the number of stroke"""
 
-    # # if-block for CHISE source (while using BLCU source for the number of strokes)
-    # if a_character in metadata_dict_chise and a_character in metadata_dict_blcu:
-    #     # component_n = count_all_components(a_character, metadata_dict_chise)  # maximal decomposition
-    #     component_n = metadata_dict_chise[a_character]['component_n']
-    #     stroke_n = metadata_dict_blcu[a_character]['stroke_n']
+    character_list = []
 
-    return component_n, stroke_n
+    for word in sentence.word_list:
+        if word.deprel != 'punct':
+            for character in word.form:
+                if not character.isascii():  # ascii letters U+0000-U+007F -> basic latin
+                    character_list.append(character)
 
+    counts = find_component_stroke_data(''.join(character_list), CT.get_character_table(), chise, max_decomposition)
+    rows = []
 
-def process_types(input_file, output_file, column_name):
-    """loads quantified data of character tokens, drops duplicates, saves quantified data for character types"""
+    for character, (component_n, stroke_n) in zip(character_list, counts):
+        rows.append([sentence.id, character, component_n, stroke_n])
 
-    token_df = pd.read_csv(input_file, delimiter='\t')
-    type_df = token_df.drop_duplicates(subset=[column_name])
-    type_df.to_csv(path_or_buf=output_file, sep='\t', index=False)
+    return rows
 
 
-# CORE FUNCTION
 def character_component_stroke(a_treebank, weighted_avg_limit):
     """quantifies a UD treebank on the character level while taking tokens and types into account,
        creates files with data quantification, xfy for original and weighted values,
        x==character length in the number of components, f(x)==its frequency, y==component length in the number of stroke"""
 
-    character_metadata_blcu = CH.create_dict('hzinfo.txt')
-    character_metadata_chise = CH.create_ids_dictionary('IDS-UCS-Basic.txt')
-
-    # tokens
-    with open('character_component_stroke_token.txt', mode='w', encoding='utf-8') as output:
-        print('sent_id' + '\t' + 'character' + '\t' + 'component_n' + '\t' + 'stroke_n', file=output)  # header
+    E.export_measures(a_treebank, weighted_avg_limit, [CHARACTER_MEASURES['character_component_stroke']])
 
-        for sentence in a_treebank.sentence_list:
-            for word in sentence.word_list:
-                if word.deprel != 'punct':
-                    for character in word.form:
-                        if not character.isascii():  # ascii letters U+0000-U+007F -> basic latin
-                            component_n, stroke_n = find_component_stroke_data(character, character_metadata_blcu, character_metadata_chise)
-                            print(sentence.id + '\t' + character + '\t' + str(component_n) + '\t' + str(stroke_n), file=output)
 
-    xfy.calculate_xfy('character_component_stroke_token.txt', 'character_component_stroke_token_xfy.txt', 'component_n', 'stroke_n')
-    xfy.calculate_weighted_xfy('character_component_stroke_token_xfy.txt', 'character_component_stroke_token_xfy_weighted.txt', weighted_avg_limit)
+CHARACTER_MEASURES = {}
 
-    # types
-    process_types('character_component_stroke_token.txt', 'character_component_stroke_type.txt', 'character')
-    xfy.calculate_xfy('character_component_stroke_type.txt', 'character_component_stroke_type_xfy.txt', 'component_n', 'stroke_n')
-    xfy.calculate_weighted_xfy('character_component_stroke_type_xfy.txt', 'character_component_stroke_type_xfy_weighted.txt', weighted_avg_limit)
+for a_measure in [
+        E.Measure('character_component_stroke', ['sent_id', 'character', 'component_n', 'stroke_n'], character_component_stroke_rows,
+                  'component_n', 'stroke_n', 'character', token_name='character_component_stroke_token')]:
+    CHARACTER_MEASURES[a_measure.name] = a_measure
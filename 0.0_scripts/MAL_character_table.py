@@ -0,0 +1,253 @@
+# COMPILED TABLE OF METADATA ABOUT CHINESE CHARACTERS SHARED BY THE WORD AND CHARACTER LEVELS
+# metadata of both sources (see MAL_word_character_processing) are stored in NumPy arrays indexed by code points,
+# i.e. metadata of a character == array[ord(character)], the table is compiled only once and cached next to the BLCU file
+
+
+import hashlib
+import json
+import os
+import shutil
+import numpy as np
+import MAL_word_character_processing as CH
+
+
+# to be increased whenever compilation of the table changes, so that old cache files are not used anymore
+CACHE_VERSION = '2'
+
+ARRAY_NAMES = ['stroke_n', 'component_n', 'max_component_n', 'depth_component_n',
+               'chise_component_n', 'chise_max_component_n', 'chise_depth_component_n', 'pinyin']
+
+# numbers of components are precomputed for decomposition up to depths 1, 2, ..., DEPTH_N (depth 1 == component_n)
+DEPTH_N = 4
+
+BLCU_FILE = 'hzinfo.txt'
+CHISE_FILE = 'IDS-UCS-Basic.txt'
+
+# table already loaded in this process, i.e. shared by all the levels
+LOADED_TABLE = {}
+
+
+class CharacterTable:
+    """metadata about Chinese characters in arrays indexed by code points, -1 == the character is not in the source,
+       code point 0 is never a character of the sources, so it is used for code points beyond the arrays"""
+
+    def __init__(self):
+        self.stroke_n = None  # int16, number of strokes (BLCU)
+        self.component_n = None  # int16, number of components (BLCU)
+        self.max_component_n = None  # int16, number of components in maximal decomposition (BLCU)
+        self.depth_component_n = None  # int16, number of components in decomposition up to depth 1..DEPTH_N (BLCU), 2D
+        self.chise_component_n = None  # int16, number of components (CHISE), None == CHISE file not available
+        self.chise_max_component_n = None  # int16, number of components in maximal decomposition (CHISE)
+        self.chise_depth_component_n = None  # int16, number of components in decomposition up to depth 1..DEPTH_N (CHISE), 2D
+        self.pinyin = None  # int32, code in the pinyin table (BLCU)
+
+        self.pinyin_table = []
+
+    def codes(self, a_string):
+        """returns code points of characters of a given string usable as indexes into the arrays"""
+
+        codes = np.fromiter(map(ord, a_string), dtype=np.int64, count=len(a_string))
+        codes[codes >= len(self.stroke_n)] = 0
+
+        return codes
+
+    def component_array(self, chise=False, max_decomposition=False, depth=None):
+        """returns the array of numbers of components of a given source,
+       max_decomposition=True -> maximal decomposition, depth=k -> decomposition up to depth k (1 <= k <= DEPTH_N)"""
+
+        prefix = ''
+
+        if chise:
+            if self.chise_component_n is None:
+                raise ValueError('ERROR! CHISE data (' + CHISE_FILE + ') not available.')
+            prefix = 'chise_'
+
+        if max_decomposition:
+            return getattr(self, prefix + 'max_component_n')
+
+        if depth is not None:
+            return getattr(self, prefix + 'depth_component_n')[:, depth - 1]
+
+        return getattr(self, prefix + 'component_n')
+
+    def find_pinyin(self, a_character):
+        """returns pinyin of a given character (BLCU), None if not available"""
+
+        code = self.pinyin[self.codes(a_character)[0]]
+
+        if code == -1:
+            return None
+
+        return self.pinyin_table[code]
+
+
+def is_decomposable(a_component, metadata_dict):
+    """decides whether a component is decomposed further, i.e. it consists of more than one component"""
+
+    return a_component in metadata_dict and metadata_dict[a_component]['component_n'] > 1
+
+
+def decompose_characters(metadata_dict):
+    """counts components of all characters of a given source in a single depth-first pass over the component graph,
+       returns a dictionary: character -> [number of components in decomposition up to depth 1, ..., DEPTH_N,
+       number of components in maximal decomposition], each character is decomposed only once,
+       a component containing (directly or indirectly) itself is not decomposed again, i.e. it is counted as one component"""
+
+    count_dict = {}
+
+    for character in metadata_dict:
+        if len(character) != 1 or character in count_dict:
+            continue
+
+        stack = [character]
+        on_stack = {character}
+
+        while stack:
+            current = stack[-1]
+
+            # components to be decomposed first
+            pending = [component for component in metadata_dict[current]['component']
+                       if is_decomposable(component, metadata_dict) and component not in count_dict and component not in on_stack]
+            if pending:
+                stack.append(pending[0])
+                on_stack.add(pending[0])
+                continue
+
+            counts = [0] * (DEPTH_N + 1)
+            for component in metadata_dict[current]['component']:
+                if is_decomposable(component, metadata_dict) and component in count_dict:
+                    component_counts = count_dict[component]
+                    counts[0] += 1
+                    for depth in range(1, DEPTH_N):
+                        counts[depth] += component_counts[depth - 1]
+                    counts[DEPTH_N] += component_counts[DEPTH_N]
+                else:  # cannot be decomposed further (or it is a cycle)
+                    for depth in range(DEPTH_N + 1):
+                        counts[depth] += 1
+
+            count_dict[current] = counts
+            stack.pop()
+            on_stack.discard(current)
+
+    return count_dict
+
+
+def fill_component_arrays(a_table, prefix, metadata_dict, size):
+    """fills arrays of numbers of components of a given source (prefix == '' for BLCU, 'chise_' for CHISE)"""
+
+    component_n = np.full(size, -1, dtype=np.int16)
+    max_component_n = np.full(size, -1, dtype=np.int16)
+    depth_component_n = np.full((size, DEPTH_N), -1, dtype=np.int16)
+
+    for character, counts in decompose_characters(metadata_dict).items():
+        component_n[ord(character)] = metadata_dict[character]['component_n']
+        max_component_n[ord(character)] = counts[DEPTH_N]
+        depth_component_n[ord(character)] = counts[:DEPTH_N]
+
+    setattr(a_table, prefix + 'component_n', component_n)
+    setattr(a_table, prefix + 'max_component_n', max_component_n)
+    setattr(a_table, prefix + 'depth_component_n', depth_component_n)
+
+
+def create_character_table(blcu_file, chise_file=None):
+    """compiles metadata of both sources into a character table, CHISE is optional"""
+
+    blcu_dict = CH.create_blcu_dict(blcu_file)
+    chise_dict = CH.create_chise_dictionary(chise_file) if chise_file is not None else {}
+
+    # only single characters can be looked up (e.g. CHISE also contains entity references)
+    size = max([ord(character) for character in list(blcu_dict) + list(chise_dict) if len(character) == 1] + [0]) + 1
+
+    a_table = CharacterTable()
+    a_table.stroke_n = np.full(size, -1, dtype=np.int16)
+    a_table.pinyin = np.full(size, -1, dtype=np.int32)
+
+    pinyin_dict = {}
+    for character, metadata in blcu_dict.items():
+        a_table.stroke_n[ord(character)] = metadata['stroke_n']
+        if metadata['pinyin'] not in pinyin_dict:
+            pinyin_dict[metadata['pinyin']] = len(a_table.pinyin_table)
+            a_table.pinyin_table.append(metadata['pinyin'])
+        a_table.pinyin[ord(character)] = pinyin_dict[metadata['pinyin']]
+
+    fill_component_arrays(a_table, '', blcu_dict, size)
+
+    if chise_file is not None:
+        fill_component_arrays(a_table, 'chise_', chise_dict, size)
+
+    return a_table
+
+
+def create_cache_key(filename_list):
+    """hashes content of source files together with the version of the table"""
+
+    key = hashlib.sha256()
+
+    for filename in filename_list:
+        with open(filename, mode='rb') as data:
+            for chunk in iter(lambda: data.read(1 << 20), b''):
+                key.update(chunk)
+        key.update(b'|')
+
+    key.update(CACHE_VERSION.encode('utf-8'))
+
+    return key.hexdigest()[:32]
+
+
+def save_character_table(a_table, directory):
+    """saves a character table into a directory, one .npy file per array + one json file with the pinyin table"""
+
+    os.makedirs(directory)
+
+    for name in ARRAY_NAMES:
+        if getattr(a_table, name) is not None:
+            np.save(os.path.join(directory, name + '.npy'), getattr(a_table, name))
+
+    with open(os.path.join(directory, 'pinyin.json'), mode='w', encoding='utf-8') as output:
+        json.dump(a_table.pinyin_table, output, ensure_ascii=False)
+
+
+def load_character_table(directory):
+    """loads a character table saved by save_character_table, arrays are memory-mapped (read-only)"""
+
+    a_table = CharacterTable()
+
+    for name in ARRAY_NAMES:
+        if os.path.isfile(os.path.join(directory, name + '.npy')):
+            setattr(a_table, name, np.load(os.path.join(directory, name + '.npy'), mmap_mode='r'))
+
+    with open(os.path.join(directory, 'pinyin.json'), mode='r', encoding='utf-8') as data:
+        a_table.pinyin_table = json.load(data)
+
+    return a_table
+
+
+def load_cached_character_table(blcu_file, chise_file=None):
+    """returns a character table of given source files, the table is cached in a directory next to the BLCU file
+       (blcu_file.cache/key) and it is recompiled only if content of the files or the compilation changes"""
+
+    filename_list = [blcu_file] if chise_file is None else [blcu_file, chise_file]
+    cache_directory = blcu_file + '.cache'
+    key_directory = os.path.join(cache_directory, create_cache_key(filename_list))
+
+    if os.path.isdir(key_directory):
+        return load_character_table(key_directory)
+
+    a_table = create_character_table(blcu_file, chise_file)
+
+    # removes outdated caches, saves into a temporary directory first, so that an interrupted run leaves no broken cache
+    shutil.rmtree(cache_directory, ignore_errors=True)
+    save_character_table(a_table, key_directory + '.tmp')
+    os.rename(key_directory + '.tmp', key_directory)
+
+    return load_character_table(key_directory)
+
+
+def get_character_table():
+    """returns the character table shared by all the levels, it is loaded only once per process,
+       CHISE is included only if its file is available"""
+
+    if 'table' not in LOADED_TABLE:
+        LOADED_TABLE['table'] = load_cached_character_table(BLCU_FILE, CHISE_FILE if os.path.isfile(CHISE_FILE) else None)
+
+    return LOADED_TABLE['table']
@@ -0,0 +1,255 @@
+# COMPACT ARRAY-BACKED (COLUMNAR) TREEBANK DATA STRUCTURE
+# tokens are stored column-wise in NumPy arrays, strings are interned in string tables,
+# sentence boundaries are stored as offsets into the token arrays
+
+
+from array import array
+import hashlib
+import json
+import os
+import shutil
+import numpy as np
+import MAL_UD_parser
+
+
+# to be increased whenever parsing or tagging changes, so that old cache files are not used anymore
+CACHE_VERSION = '1'
+
+ARRAY_NAMES = ['sentence_offsets', 'id', 'head', 'parent', 'form', 'form_len', 'lemma', 'upos', 'xpos', 'feats',
+               'deprel', 'deps', 'transliteration', 'clause']
+
+
+class StringTable:
+    """interns strings, i.e. each distinct string is stored only once and referred to by its code"""
+
+    def __init__(self):
+        self.string_list = []
+        self.code_dict = {}
+
+    def __len__(self):
+        return len(self.string_list)
+
+    def __getitem__(self, code):
+        return self.string_list[code]
+
+    def intern(self, a_string):
+        """returns a code of a given string, adds the string to the table if it is not there yet"""
+
+        code = self.code_dict.get(a_string)
+
+        if code is None:
+            code = len(self.string_list)
+            self.code_dict[a_string] = code
+            self.string_list.append(a_string)
+
+        return code
+
+
+class ColumnarTreebank:
+    """treebank stored in NumPy arrays (one value per token) and string tables,
+       sentence i consists of tokens sentence_offsets[i]:sentence_offsets[i + 1],
+       sentence_list yields linked Sentence objects rebuilt one at a time, so all the measures can consume it"""
+
+    def __init__(self):
+        self.sentence_offsets = None  # int64, number of sentences + 1
+        self.sentence_id_list = []
+        self.sentence_text_list = []
+
+        self.id = None  # int32, word ID within its sentence
+        self.head = None  # int32, parentID within its sentence (0 == root)
+        self.parent = None  # int32, index of a parent in the token arrays (-1 == no parent, i.e. root or punct)
+        self.form = None  # int32, code in the forms table
+        self.form_len = None  # int16, form length in characters
+        self.lemma = None  # int32, code in the forms table
+        self.upos = None  # int16, code in the tags table
+        self.xpos = None  # int16, code in the tags table
+        self.feats = None  # int32, code in the feats table
+        self.deprel = None  # int16, code in the deprels table
+        self.deps = None  # int32, code in the feats table
+        self.transliteration = None  # int32, code in the forms table (-1 == not available)
+        self.clause = None  # bool, word commented as 'clause'
+
+        self.forms = StringTable()  # forms, lemmas and transliterations
+        self.tags = StringTable()
+        self.feats_table = StringTable()
+        self.deprels = StringTable()
+
+    def __len__(self):
+        return len(self.sentence_id_list)
+
+    @property
+    def sentence_list(self):
+        return (self.create_sentence(index) for index in range(len(self.sentence_id_list)))
+
+    def token_sentence_index(self):
+        """returns an array containing an index of a sentence for each token"""
+
+        return np.repeat(np.arange(len(self.sentence_id_list)), np.diff(self.sentence_offsets))
+
+    def create_sentence(self, index):
+        """rebuilds a fully linked Sentence object of a given sentence index from the token arrays"""
+
+        a_sentence = MAL_UD_parser.Sentence()
+        a_sentence.id = self.sentence_id_list[index]
+        a_sentence.text = self.sentence_text_list[index]
+
+        for token in range(self.sentence_offsets[index], self.sentence_offsets[index + 1]):
+            new_word = MAL_UD_parser.Word()
+            new_word.id = int(self.id[token])
+            new_word.form = self.forms[self.form[token]]
+            new_word.lemma = self.forms[self.lemma[token]]
+            new_word.upos = self.tags[self.upos[token]]
+            new_word.xpos = self.tags[self.xpos[token]]
+            new_word.feats = self.feats_table[self.feats[token]]
+            new_word.parentID = int(self.head[token])
+            new_word.deprel = self.deprels[self.deprel[token]]
+            new_word.deps = self.feats_table[self.deps[token]]
+            if self.transliteration[token] != -1:
+                new_word.transliteration = self.forms[self.transliteration[token]]
+            if self.clause[token]:
+                new_word.comment = 'clause'
+            a_sentence.word_list.append(new_word)
+
+        # clausal comments are taken from the clause column, hence, no tagging here
+        a_sentence = MAL_UD_parser.assign_next_node_in_sentence(a_sentence)
+        a_sentence = MAL_UD_parser.find_parent_and_children_in_sentence(a_sentence)
+        a_sentence = MAL_UD_parser.index_subtrees_in_sentence(a_sentence)
+
+        return a_sentence
+
+
+def create_columnar_treebank(filename):
+    """parses a conllu file sentence by sentence and returns a columnar treebank data structure"""
+
+    a_treebank = ColumnarTreebank()
+
+    offsets = array('q', [0])
+    ids, heads, parents = array('i'), array('i'), array('i')
+    forms, form_lens, lemmas, feats, deps, transliterations = array('i'), array('h'), array('i'), array('i'), array('i'), array('i')
+    uposes, xposes, deprels = array('h'), array('h'), array('h')
+    clauses = array('b')
+
+    for sentence in MAL_UD_parser.iterate_sentences(filename):
+        offset = offsets[-1]
+        a_treebank.sentence_id_list.append(sentence.id)
+        a_treebank.sentence_text_list.append(sentence.text)
+
+        for word in sentence.word_list:
+            ids.append(word.id)
+            heads.append(word.parentID)
+            if word.parent is not None:
+                parents.append(offset + word.parent.id - 1)
+            else:
+                parents.append(-1)
+            forms.append(a_treebank.forms.intern(word.form))
+            form_lens.append(len(word.form))
+            lemmas.append(a_treebank.forms.intern(word.lemma))
+            uposes.append(a_treebank.tags.intern(word.upos))
+            xposes.append(a_treebank.tags.intern(word.xpos))
+            feats.append(a_treebank.feats_table.intern(word.feats))
+            deprels.append(a_treebank.deprels.intern(word.deprel))
+            deps.append(a_treebank.feats_table.intern(word.deps))
+            if word.transliteration is not None:
+                transliterations.append(a_treebank.forms.intern(word.transliteration))
+            else:
+                transliterations.append(-1)
+            clauses.append(word.comment == 'clause')
+
+        offsets.append(offset + len(sentence.word_list))
+
+    a_treebank.sentence_offsets = np.frombuffer(offsets, dtype=np.int64)
+    a_treebank.id = np.frombuffer(ids, dtype=np.int32)
+    a_treebank.head = np.frombuffer(heads, dtype=np.int32)
+    a_treebank.parent = np.frombuffer(parents, dtype=np.int32)
+    a_treebank.form = np.frombuffer(forms, dtype=np.int32)
+    a_treebank.form_len = np.frombuffer(form_lens, dtype=np.int16)
+    a_treebank.lemma = np.frombuffer(lemmas, dtype=np.int32)
+    a_treebank.upos = np.frombuffer(uposes, dtype=np.int16)
+    a_treebank.xpos = np.frombuffer(xposes, dtype=np.int16)
+    a_treebank.feats = np.frombuffer(feats, dtype=np.int32)
+    a_treebank.deprel = np.frombuffer(deprels, dtype=np.int16)
+    a_treebank.deps = np.frombuffer(deps, dtype=np.int32)
+    a_treebank.transliteration = np.frombuffer(transliterations, dtype=np.int32)
+    a_treebank.clause = np.frombuffer(clauses, dtype=np.int8).astype(bool)
+
+    return a_treebank
+
+
+def create_cache_key(filename):
+    """hashes content of a conllu file together with the parser/tagging settings"""
+
+    key = hashlib.sha256()
+
+    with open(filename, mode='rb') as data:
+        for chunk in iter(lambda: data.read(1 << 20), b''):
+            key.update(chunk)
+
+    key.update(('|' + CACHE_VERSION + '|' + ','.join(MAL_UD_parser.CLAUSAL_TAGS)).encode('utf-8'))
+
+    return key.hexdigest()[:32]
+
+
+def save_columnar_treebank(a_treebank, directory):
+    """saves a columnar treebank into a directory, one .npy file per array + one json file with the string tables"""
+
+    os.makedirs(directory)
+
+    for name in ARRAY_NAMES:
+        np.save(os.path.join(directory, name + '.npy'), getattr(a_treebank, name))
+
+    string_tables = {'sentence_id_list': a_treebank.sentence_id_list,
+                     'sentence_text_list': a_treebank.sentence_text_list,
+                     'forms': a_treebank.forms.string_list,
+                     'tags': a_treebank.tags.string_list,
+                     'feats_table': a_treebank.feats_table.string_list,
+                     'deprels': a_treebank.deprels.string_list}
+
+    with open(os.path.join(directory, 'strings.json'), mode='w', encoding='utf-8') as output:
+        json.dump(string_tables, output, ensure_ascii=False)
+
+
+def load_columnar_treebank(directory):
+    """loads a columnar treebank saved by save_columnar_treebank, arrays are memory-mapped (read-only)"""
+
+    a_treebank = ColumnarTreebank()
+
+    for name in ARRAY_NAMES:
+        setattr(a_treebank, name, np.load(os.path.join(directory, name + '.npy'), mmap_mode='r'))
+
+    with open(os.path.join(directory, 'strings.json'), mode='r', encoding='utf-8') as data:
+        string_tables = json.load(data)
+
+    a_treebank.sentence_id_list = string_tables['sentence_id_list']
+    a_treebank.sentence_text_list = string_tables['sentence_text_list']
+
+    for name in ['forms', 'tags', 'feats_table', 'deprels']:
+        # codes are not needed when the treebank is only read
+        getattr(a_treebank, name).string_list = string_tables[name]
+
+    return a_treebank
+
+
+def create_cache_directory(filename):
+    """returns the directory of the cached columnar treebank of a conllu file, i.e. filename.cache/key"""
+
+    return os.path.join(filename + '.cache', create_cache_key(filename))
+
+
+def load_cached_treebank(filename):
+    """returns a columnar treebank of a conllu file, the parsed treebank is cached in a directory next to the file
+       (filename.cache/key) and it is rebuilt only if the content of the file or the parser settings change"""
+
+    cache_directory = filename + '.cache'
+    key_directory = create_cache_directory(filename)
+
+    if os.path.isdir(key_directory):
+        return load_columnar_treebank(key_directory)
+
+    a_treebank = create_columnar_treebank(filename)
+
+    # removes outdated caches, saves into a temporary directory first, so that an interrupted run leaves no broken cache
+    shutil.rmtree(cache_directory, ignore_errors=True)
+    save_columnar_treebank(a_treebank, key_directory + '.tmp')
+    os.rename(key_directory + '.tmp', key_directory)
+
+    return load_columnar_treebank(key_directory)
@@ -0,0 +1,163 @@
+# ENGINE PROCESSING ANY NUMBER OF MEASURES (AND THEIR VARIANTS) DURING A SINGLE PASS THROUGH A TREEBANK
+
+
+from contextlib import ExitStack
+from functools import partial
+import MAL_output
+import MAL_summary
+
+
+class Measure:
+    """a measure processed by the engine:
+       name == a name used in the files of tokens (token_name) and types (type_name),
+       header == columns of the file of tokens,
+       create_rows == a function returning rows of a sentence, i.e. create_rows(data, state),
+       where data == create_data(sentence) (shared by all measures with the same create_data, the sentence itself by default)
+       and state == a dictionary carried over from one sentence to another,
+       construct_column, constituent_column == columns of construct and constituent lengths,
+       type_column == a column identifying types (None == types are not processed),
+       variant == a suffix of output files of a variant of the measure (see MAL_variants)"""
+
+    def __init__(self, name, header, create_rows, construct_column, constituent_column, type_column=None,
+                 create_data=None, token_name=None, type_name=None, variant=''):
+        self.name = name
+        self.header = header
+        self.create_rows = create_rows
+        self.construct_column = construct_column
+        self.constituent_column = constituent_column
+        self.type_column = type_column
+        self.create_data = create_data
+        self.token_name = name if token_name is None else token_name
+        self.type_name = name + '_type' if type_name is None else type_name
+        self.variant = variant
+
+    def filename(self, a_name, suffix=''):
+        """returns a name of an output file in the form of name + suffix (e.g. '_xfy') + '_' + variant + '.txt'"""
+
+        if self.variant:
+            return a_name + suffix + '_' + self.variant + '.txt'
+
+        return a_name + suffix + '.txt'
+
+    def create_variant(self, variant, **options):
+        """returns the measure which rows are created with given options and saved into files with a variant suffix"""
+
+        return Measure(self.name, self.header, partial(self.create_rows, **options), self.construct_column, self.constituent_column,
+                       self.type_column, self.create_data, self.token_name, self.type_name, variant)
+
+
+def create_type_key(value):
+    """returns a key identifying a type, i.e. a fingerprint of the value (if it has one) or the value as it is written"""
+
+    fingerprint = getattr(value, 'fingerprint', None)
+
+    if fingerprint is not None:
+        return fingerprint
+
+    return str(value)
+
+
+def create_summary(measure):
+    """returns an empty summary of a measure (see MAL_summary) with names of its output files"""
+
+    token_files = [measure.filename(measure.token_name), measure.filename(measure.token_name, '_xfy'),
+                   measure.filename(measure.token_name, '_xfy_weighted')]
+    type_files = None
+
+    if measure.type_column is not None:
+        type_files = [measure.filename(measure.type_name), measure.filename(measure.type_name, '_xfy'),
+                      measure.filename(measure.type_name, '_xfy_weighted')]
+
+    return MAL_summary.MeasureSummary(token_files, type_files)
+
+
+def create_table_writer(measure, table, store=None):
+    """returns a writer of the file of tokens (table == 'token') or types (table == 'type') of a measure,
+       store -> the table is written into a columnar result store instead (see MAL_store)"""
+
+    if store is not None:
+        return store.create_writer(measure, table)
+
+    return MAL_output.TableWriter(measure.filename(measure.token_name if table == 'token' else measure.type_name), measure.header)
+
+
+def export_measures(a_treebank, weighted_avg_limit, measure_list, type_files=True, check_collisions=False, summary_file=None,
+                    store=None):
+    """walks the treebank only once and feeds every given measure with sentence data shared among them,
+       creates files with data quantification, xfy for original and weighted values (+ types if applicable),
+       types are collected during the pass (the first occurrence of each type), xfy is accumulated during the pass as well,
+       type_files=False -> files with data quantification of types are not created,
+       check_collisions=True -> types identified by fingerprints are checked against their strings (slower),
+       weighted_avg_limit can be a list of limits (all of them are processed at once),
+       weighted_avg_limit=None -> weighted xfy is not created (e.g. it is calculated from the xfy files later, see MAL_build),
+       summary_file -> summaries of the measures are saved (see MAL_summary),
+       store -> tables of tokens and types are written into a columnar result store (see MAL_store) instead of their files,
+       returns the summaries"""
+
+    state_list = [{} for _ in measure_list]  # data carried over from one sentence to another
+    summary_list = [create_summary(measure) for measure in measure_list]
+    type_string_dict = {}  # (measure index, fingerprint) -> string of the type, only if check_collisions=True
+
+    # columns of construct lengths, constituent lengths and types in rows of the measures
+    column_list = []
+    for measure in measure_list:
+        type_index = measure.header.index(measure.type_column) if measure.type_column is not None else None
+        column_list.append((measure.header.index(measure.construct_column), measure.header.index(measure.constituent_column), type_index))
+
+    with ExitStack() as stack:
+        output_list = []
+        type_output_list = []
+        for measure in measure_list:
+            output_list.append(stack.enter_context(create_table_writer(measure, 'token', store)))
+            type_output = None
+            if measure.type_column is not None and type_files:
+                type_output = stack.enter_context(create_table_writer(measure, 'type', store))
+            type_output_list.append(type_output)
+
+        for sentence in a_treebank.sentence_list:
+            data_dict = {None: sentence}  # create_data -> data of the sentence
+            for index, measure in enumerate(measure_list):
+                if measure.create_data not in data_dict:
+                    data_dict[measure.create_data] = measure.create_data(sentence)
+                construct_index, constituent_index, type_index = column_list[index]
+                for row in measure.create_rows(data_dict[measure.create_data], state_list[index]):
+                    output_list[index].add(row)
+                    summary_list[index].token_xfy.add(row[construct_index], row[constituent_index])
+
+                    # types == rows with a type (its fingerprint or its string) not seen before
+                    if type_index is not None:
+                        type_key = create_type_key(row[type_index])
+                        if check_collisions and not isinstance(type_key, str):
+                            type_string = type_string_dict.setdefault((index, type_key), str(row[type_index]))
+                            if type_string != str(row[type_index]):
+                                raise ValueError('ERROR! Types ' + type_string + ' and ' + str(row[type_index]) + ' share a fingerprint.')
+                        if summary_list[index].add_type(type_key, row[construct_index], row[constituent_index]):
+                            if type_output_list[index] is not None:
+                                type_output_list[index].add(row)
+
+    # several limits -> one weighted xfy file per limit, e.g. name_xfy_weighted_10.txt
+    if weighted_avg_limit is None:
+        limit_list = []
+        suffix_list = []
+    elif isinstance(weighted_avg_limit, (list, tuple)):
+        limit_list = list(weighted_avg_limit)
+        suffix_list = ['_xfy_weighted_' + str(limit) for limit in limit_list]
+    else:
+        limit_list = [weighted_avg_limit]
+        suffix_list = ['_xfy_weighted']
+
+    for measure, summary in zip(measure_list, summary_list):
+        # tokens
+        summary.token_xfy.save_xfy(measure.filename(measure.token_name, '_xfy'))
+        summary.token_xfy.save_weighted_xfy([measure.filename(measure.token_name, suffix) for suffix in suffix_list], limit_list)
+
+        # types
+        if measure.type_column is not None:
+            type_xfy = summary.create_type_xfy()
+            type_xfy.save_xfy(measure.filename(measure.type_name, '_xfy'))
+            type_xfy.save_weighted_xfy([measure.filename(measure.type_name, suffix) for suffix in suffix_list], limit_list)
+
+    if summary_file is not None:
+        MAL_summary.save_summary(summary_list, summary_file)
+
+    return summary_list
@@ -1,38 +1,52 @@
 # MAIN FUNCTIONS
+# (see MAL_build for an incremental build of a selected subset of measures from the command line)
 
 
 import MAL_UD_parser
+import MAL_columnar_treebank
+import MAL_engine as E
 import MAL_syntactic_level as S
 import MAL_word_level as W
 import MAL_character_level as C
+import MAL_variants as V
+import MAL_summary as SU
+import MAL_resampling as R
+import MAL_parallel as P
+import MAL_store as ST
 import MAL_nlreg as nlr
 
 
-def export_data(treebank_file):
-    """creates a treebank data structure, calls functions for processing given linguistic levels"""
+def export_data(treebank_file, streamed=False, columnar=False, cached=False):
+    """creates a treebank data structure, calls functions for processing given linguistic levels,
+       streamed=True keeps only one sentence in memory at a time (the file is re-read by each function),
+       columnar=True keeps the treebank in compact NumPy arrays (the file is read only once),
+       cached=True loads the columnar treebank from its cache next to the file (created on the first run)"""
 
-    a_treebank = MAL_UD_parser.create_treebank(treebank_file)
+    if columnar:
+        a_treebank = MAL_columnar_treebank.create_columnar_treebank(treebank_file)
+    else:
+        a_treebank = MAL_UD_parser.create_treebank(treebank_file, streamed, cached)
     weighted_avg_limit = 10
 
-    # SYNTACTIC LEVEL
-    # sentence level
-    S.sentence_clause_word_cut(a_treebank, weighted_avg_limit)
-    S.sentence_clause_word_punct(a_treebank, weighted_avg_limit)  # punctuation approach
-    S.sentence_phrase_word(a_treebank, weighted_avg_limit)
-    S.sentence_clause_phrase_cut(a_treebank, weighted_avg_limit)
-    S.sentence_clause_lds_cut(a_treebank, weighted_avg_limit)
-
-    # clause level
-    S.clause_word_character_cut(a_treebank, weighted_avg_limit)
-    S.clause_word_character_punct(a_treebank, weighted_avg_limit)  # punctuation approach
-    S.clause_phrase_word_cut(a_treebank, weighted_avg_limit)
-    S.clause_lds_word_cut(a_treebank, weighted_avg_limit)
-    # S.clause_lds_word_sud(a_treebank, weighted_avg_limit)  # one-clause sentences in UD and SUD frameworks
-
-    # phrase level
-    S.s_phrase_word_character(a_treebank, weighted_avg_limit)
-    S.c_phrase_word_character_cut(a_treebank, weighted_avg_limit)
-    S.lds_word_character_cut(a_treebank, weighted_avg_limit)
+    # SYNTACTIC LEVEL (all the measures are processed during a single pass through the treebank)
+    S.export_syntactic_measures(a_treebank, weighted_avg_limit, [
+        # sentence level
+        'sentence_clause_word_cut',
+        'sentence_clause_word_punct',  # punctuation approach
+        'sentence_phrase_word',
+        'sentence_clause_phrase_cut',
+        'sentence_clause_lds_cut',
+        # clause level
+        'clause_word_character_cut',
+        'clause_word_character_punct',  # punctuation approach
+        'clause_phrase_word_cut',
+        'clause_lds_word_cut',
+        # phrase level
+        's_phrase_word_character',
+        'c_phrase_word_character_cut',
+        'lds_word_character_cut'])
+    # one-clause sentences in UD and SUD frameworks (names or directories of both treebank files have to be changed accordingly)
+    # S.clause_lds_word_sud('zh_gsdsimp-ud-train.conllu', 'zh_gsdsimp-sud-train.conllu', weighted_avg_limit)
 
     # WORD LEVEL
     W.word_character_component(a_treebank, weighted_avg_limit)
@@ -42,15 +56,26 @@ def export_data(treebank_file):
     # CHARACTER LEVEL
     C.character_component_stroke(a_treebank, weighted_avg_limit)
 
+    # VARIANTS (all combinations of given switches during a single pass, see MAL_variants)
+    # V.export_variants(a_treebank, weighted_avg_limit, V.create_switch_matrix(['chise', 'max_decomposition', 'prop_nouns_excl']))
 
-def process_nlreg_data(filename_list):
+
+def process_nlreg_data(filename_list, external_nlreg=False):
     """loops via a list of files containing xfy values of a given triplet of language units,
-       creates NLREG program files and output files with results for both (truncated and complete) models"""
+       fits both (truncated and complete) models (all the files at once) and creates output files with results (.lst),
+       external_nlreg=True -> creates NLREG program files and runs NLREG instead of the built-in fitter,
+       returns filename -> results of both models (built-in fitter only)"""
+
+    # checks content of a file if it is not empty
+    filename_list = [filename for filename in filename_list if len(nlr.load_xfy_file(filename)) > 1]
 
-    for filename in filename_list:
-        # checks content of a file if it is not empty
-        if len(nlr.load_xfy_file(filename)) > 1:
+    if external_nlreg:
+        for filename in filename_list:
             nlr.run_nlreg(filename)
+        return {}
+
+    # all the files are fitted at once
+    return nlr.fit_nlreg_batch(filename_list)
 
 
 filename_list = ['sentence_clause_word_cut_xfy.txt', 'sentence_clause_word_cut_xfy_weighted.txt',
@@ -82,3 +107,21 @@ filename_list = ['sentence_clause_word_cut_xfy.txt', 'sentence_clause_word_cut_x
 # Example of calling both the functions above
 export_data('zh_pud-ud-test.conllu')
 process_nlreg_data(filename_list)
+
+# Example of combining corpora without processing them again (summaries are saved by E.export_measures(..., summary_file=...)),
+# e.g. PUD == PUD-N + PUD-W
+# SU.export_summary_xfy(['pud-n_summary.json', 'pud-w_summary.json'], 10, 'pud_summary.json')
+
+# Example of bootstrap confidence intervals for parameters of both models (resampling sentences of quantified data of tokens)
+# R.save_bootstrap_report(R.bootstrap('clause_word_character_cut.txt', 'word_n', 'character_n', 10000), 'clause_word_character_cut_bootstrap.txt')
+
+# Example of empirical p-values of the parameter b under the null model (constituent lengths shuffled across constructs)
+# R.save_permutation_report(R.permutation_tests([['clause_word_character_cut.txt', 'word_n', 'character_n']], 1000), 'permutation_report.txt')
+
+# Example of processing several corpora in parallel (one task per corpus and group of measures, output_directory/corpus/group)
+# P.process_corpora({'PUD': 'zh_pud-ud-test.conllu', 'GSD': 'zh_gsdsimp-ud-train.conllu'}, 'output', weighted_avg_limit=10)
+
+# Example of a columnar result store of a corpus (requires pyarrow), tables of tokens and types are written into the store,
+# tab-separated files can be exported from it again, several corpora are loaded by ST.load_corpora({'PUD': 'pud_store', ...}, ...)
+# E.export_measures(MAL_UD_parser.create_treebank('zh_pud-ud-test.conllu'), 10, list(V.ALL_MEASURES.values()), store=ST.ResultStore('pud_store'))
+# ST.export_tsv('pud_store')
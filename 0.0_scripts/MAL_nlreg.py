@@ -1,8 +1,11 @@
 # FUNCTIONS FOR CALCULATING PARAMETERS OF MAL'S MODELS AND COEFFICIENT OF DETERMINATION
 # WHILE USING NLREG -> Sherrod, P. H. (2005) NLREG Version 6.3 (Advanced)
+# or the built-in fitter below (Levenberg-Marquardt method, the same models, no external program needed)
 
 
+import os
 from subprocess import run
+import numpy as np
 
 
 def load_xfy_file(input_file):
@@ -58,17 +61,279 @@ def prepare_program_file(input_file, truncated_program_file, complete_program_fi
 def run_nlreg(input_file):
     """creates names for nlr and lst files and run NLREG using cmd line"""
 
-    input_file_split = input_file.split('.')
+    # only the extension is removed (names of files in the data directories contain dots, e.g. 0.0.0.1_..._xfy.txt)
+    input_file_base = os.path.splitext(input_file)[0]
 
-    truncated_program_file = input_file_split[0] + "_truncated.nlr"
-    complete_program_file = input_file_split[0] + "_complete.nlr"
+    truncated_program_file = input_file_base + "_truncated.nlr"
+    complete_program_file = input_file_base + "_complete.nlr"
 
     prepare_program_file(input_file, truncated_program_file, complete_program_file)
 
     # for an output of truncated model
-    nlreg_truncated_output = truncated_program_file.split('.')[0] + '_nlreg.lst'
+    nlreg_truncated_output = os.path.splitext(truncated_program_file)[0] + '_nlreg.lst'
     # for an output of complete model
-    nlreg_complete_output = complete_program_file.split('.')[0] + '_nlreg.lst'
+    nlreg_complete_output = os.path.splitext(complete_program_file)[0] + '_nlreg.lst'
 
     run(['NLREGCA', truncated_program_file, '/list', nlreg_truncated_output])
     run(['NLREGCA', complete_program_file, '/list', nlreg_complete_output])
+
+
+# BUILT-IN FITTER
+# truncated model: y = firstConstr * x^b, firstConstr == constituent length of the first construct (an empirically obtained value)
+# complete model: y = a * x^b * exp(-c * x)
+def truncated_model(x, parameters, first_constr):
+    """returns values of the truncated model and its Jacobian (derivatives with respect to b),
+       x == an array of series (one per row), parameters == columns of parameters of the series"""
+
+    y = first_constr * x ** parameters[0]
+
+    return y, np.stack([y * np.log(x)], axis=-1)
+
+
+def complete_model(x, parameters, first_constr=None):
+    """returns values of the complete model and its Jacobian (derivatives with respect to a, b, c),
+       x == an array of series (one per row), parameters == columns of parameters of the series"""
+
+    a, b, c = parameters
+    power = x ** b * np.exp(-c * x)
+    y = a * power
+
+    return y, np.stack([power, y * np.log(x), -x * y], axis=-1)
+
+
+MODELS = {'truncated': [truncated_model, ['b'], 'y = firstConstr * (x^b)'],
+          'complete': [complete_model, ['a', 'b', 'c'], 'y = a * x^b * exp(-c * x)']}
+
+
+class FitResult:
+    """result of fitting a model: parameters, their standard errors, coefficient of determination (R^2) etc."""
+
+    def __init__(self, model, parameter_names, parameters, standard_errors, r_squared, adjusted_r_squared, residual_sum,
+                 observation_n, iteration_n, converged, first_constr=None):
+        self.model = model
+        self.parameter_names = parameter_names
+        self.parameters = parameters
+        self.standard_errors = standard_errors
+        self.r_squared = r_squared
+        self.adjusted_r_squared = adjusted_r_squared
+        self.residual_sum = residual_sum
+        self.observation_n = observation_n
+        self.iteration_n = iteration_n
+        self.converged = converged
+        self.first_constr = first_constr
+
+    def parameter_dict(self):
+        """returns parameter name -> [estimate, standard error]"""
+
+        return {name: [value, error] for name, value, error in zip(self.parameter_names, self.parameters, self.standard_errors)}
+
+
+def evaluate_model(model, x, parameters, first_constr):
+    """returns values and Jacobians of a model for a batch of series, parameters == one row per series"""
+
+    return MODELS[model][0](x, parameters.T[:, :, None], first_constr[:, None])
+
+
+def estimate_initial_parameters(model, x, y, weights, first_constr):
+    """estimates initial parameters of a batch of series by (closed-form) linear regression of logarithms,
+       i.e. ln y = ln a + b * ln x - c * x, weights == 1 for data points, 0 for padding"""
+
+    log_x = np.log(x)
+
+    if model == 'truncated':
+        denominator = np.sum(weights * log_x ** 2, axis=1)
+        numerator = np.sum(weights * log_x * np.log(y / first_constr[:, None]), axis=1)
+        return np.where(denominator > 0, numerator / np.where(denominator > 0, denominator, 1), 0.0)[:, None]
+
+    design = np.stack([np.ones_like(x), log_x, -x], axis=-1) * weights[:, :, None]
+    normal_matrix = np.einsum('blp,blq->bpq', design, design)
+    right_side = np.einsum('blp,bl->bp', design, np.log(y) * weights)
+    solution = np.einsum('bpq,bq->bp', np.linalg.pinv(normal_matrix), right_side)
+
+    return np.stack([np.exp(solution[:, 0]), solution[:, 1], solution[:, 2]], axis=-1)
+
+
+def solve_batch(matrices, vectors):
+    """solves a batch of linear systems (pseudo-inverse if some of them are singular)"""
+
+    try:
+        return np.linalg.solve(matrices, vectors[:, :, None])[:, :, 0]
+    except np.linalg.LinAlgError:
+        return np.einsum('bpq,bq->bp', np.linalg.pinv(matrices), vectors)
+
+
+def fit_model_batch(model, x_list, y_list, first_constr_list=None, max_iteration_n=500, tolerance=1e-12):
+    """fits a model ('truncated' or 'complete') to many series at once, the series are padded to the same length and
+       Levenberg-Marquardt iterations (analytic Jacobian) run on all of them in parallel, each series with its own damping
+       and stopping rule, first_constr_list == constituent lengths of the first constructs (truncated model),
+       returns a list of FitResult"""
+
+    model_function, parameter_names, formula = MODELS[model]
+    series_n = len(x_list)
+    length = max([len(x) for x in x_list] + [1])
+    parameter_n = len(parameter_names)
+
+    # padding: x == y == 1, weight == 0
+    x = np.ones((series_n, length))
+    y = np.ones((series_n, length))
+    weights = np.zeros((series_n, length))
+    for index, (series_x, series_y) in enumerate(zip(x_list, y_list)):
+        x[index, :len(series_x)] = series_x
+        y[index, :len(series_y)] = series_y
+        weights[index, :len(series_x)] = 1
+
+    if first_constr_list is None:
+        first_constr = np.ones(series_n)
+    else:
+        first_constr = np.array([1.0 if value is None else value for value in first_constr_list], dtype=np.float64)
+
+    parameters = estimate_initial_parameters(model, x, y, weights, first_constr)
+    values, jacobian = evaluate_model(model, x, parameters, first_constr)
+    jacobian = jacobian * weights[:, :, None]
+    residual_sum = np.sum(weights * (y - values) ** 2, axis=1)
+    damping = np.full(series_n, 1e-3)
+    converged = np.zeros(series_n, dtype=bool)
+    iteration_n = np.zeros(series_n, dtype=np.int64)
+
+    for _ in range(max_iteration_n):
+        active = np.flatnonzero(~converged)
+        if len(active) == 0:
+            break
+        iteration_n[active] += 1
+
+        normal_matrix = np.einsum('blp,blq->bpq', jacobian[active], jacobian[active])
+        gradient = np.einsum('blp,bl->bp', jacobian[active], weights[active] * (y[active] - values[active]))
+        scaling = np.maximum(np.diagonal(normal_matrix, axis1=1, axis2=2), 1e-12)
+
+        # the damping of each series is increased until its step decreases the residual sum of squares
+        step = np.zeros((len(active), parameter_n))
+        new_residual_sum = np.zeros(len(active))
+        improved = np.zeros(len(active), dtype=bool)
+        pending = np.arange(len(active))
+        while len(pending) > 0:
+            damped_matrix = normal_matrix[pending] + (damping[active[pending]] * scaling[pending].T).T[:, :, None] * np.eye(parameter_n)
+            trial_step = solve_batch(damped_matrix, gradient[pending])
+            rows = active[pending]
+            trial_values = evaluate_model(model, x[rows], parameters[rows] + trial_step, first_constr[rows])[0]
+            trial_residual_sum = np.sum(weights[rows] * (y[rows] - trial_values) ** 2, axis=1)
+            accepted = np.isfinite(trial_residual_sum) & (trial_residual_sum <= residual_sum[rows])
+            step[pending[accepted]] = trial_step[accepted]
+            new_residual_sum[pending[accepted]] = trial_residual_sum[accepted]
+            improved[pending[accepted]] = True
+            damping[rows[~accepted]] *= 10
+            pending = pending[~accepted & (damping[rows] < 1e12)]
+
+        # no step decreases the residual sum of squares -> a minimum
+        converged[active[~improved]] = True
+
+        rows = active[improved]
+        step = step[improved]
+        new_residual_sum = new_residual_sum[improved]
+        parameters[rows] += step
+        converged[rows] = ((residual_sum[rows] - new_residual_sum <= tolerance * np.maximum(residual_sum[rows], tolerance))
+                           | (np.linalg.norm(step, axis=1) <= tolerance * (np.linalg.norm(parameters[rows], axis=1) + tolerance)))
+        new_values, new_jacobian = evaluate_model(model, x[rows], parameters[rows], first_constr[rows])
+        values[rows] = new_values
+        jacobian[rows] = new_jacobian * weights[rows][:, :, None]
+        residual_sum[rows] = new_residual_sum
+        damping[rows] = np.maximum(damping[rows] / 10, 1e-12)
+
+    result_list = []
+
+    for index in range(series_n):
+        observation_n = int(weights[index].sum())
+        series_y = y[index, :observation_n]
+        total_sum = np.sum((series_y - np.mean(series_y)) ** 2)
+        r_squared = 1 - residual_sum[index] / total_sum if total_sum > 0 else float('nan')
+
+        # standard errors from the covariance matrix (residual variance * (J^T J)^-1)
+        if observation_n > parameter_n:
+            adjusted_r_squared = 1 - (1 - r_squared) * (observation_n - 1) / (observation_n - parameter_n)
+            try:
+                covariance = np.linalg.inv(jacobian[index].T @ jacobian[index]) * residual_sum[index] / (observation_n - parameter_n)
+                standard_errors = np.sqrt(np.abs(np.diag(covariance)))
+            except np.linalg.LinAlgError:
+                standard_errors = np.full(parameter_n, float('nan'))
+        else:
+            adjusted_r_squared = float('nan')
+            standard_errors = np.full(parameter_n, float('nan'))
+
+        result_list.append(FitResult(model, parameter_names, parameters[index].tolist(), standard_errors.tolist(), float(r_squared),
+                                     float(adjusted_r_squared), float(residual_sum[index]), observation_n, int(iteration_n[index]),
+                                     bool(converged[index]), first_constr_list[index] if first_constr_list is not None else None))
+
+    return result_list
+
+
+def fit_model(model, x, y, first_constr=None, max_iteration_n=500, tolerance=1e-12):
+    """fits a model ('truncated' or 'complete') to given data using the Levenberg-Marquardt method with an analytic Jacobian,
+       returns FitResult"""
+
+    return fit_model_batch(model, [x], [y], [first_constr], max_iteration_n, tolerance)[0]
+
+
+def save_report(result, input_file, output_file):
+    """saves results of fitting in a listing similar to the one of NLREG (.lst)"""
+
+    with open(output_file, mode='w', encoding='utf-8') as output:
+        print('Data file: ' + input_file, file=output)
+        print('Function: ' + MODELS[result.model][2], file=output)
+        if result.first_constr is not None:
+            print('Constant firstConstr = ' + str(result.first_constr), file=output)
+        print('', file=output)
+        print('Number of observations = ' + str(result.observation_n), file=output)
+        print('Number of iterations performed = ' + str(result.iteration_n), file=output)
+        print('Convergence achieved' if result.converged else 'Convergence NOT achieved', file=output)
+        print('', file=output)
+        print('Parameter' + '\t' + 'Final estimate' + '\t' + 'Standard error', file=output)
+        for name, value, error in zip(result.parameter_names, result.parameters, result.standard_errors):
+            print(name + '\t' + str(value) + '\t' + str(error), file=output)
+        print('', file=output)
+        print('Residual sum of squares = ' + str(result.residual_sum), file=output)
+        print('Proportion of variance explained (R^2) = ' + str(result.r_squared), file=output)
+        print('Adjusted coefficient of multiple determination (Ra^2) = ' + str(result.adjusted_r_squared), file=output)
+
+
+def load_xy(input_file):
+    """returns construct lengths (x) and constituent lengths (y) of an xfy file"""
+
+    # xfy data file contains a header, hence, index starts with 1 to exclude the header
+    data_list = load_xfy_file(input_file)[1:]
+
+    return [float(row[0]) for row in data_list], [float(row[2]) for row in data_list]
+
+
+def fit_nlreg_batch(filename_list):
+    """fits both (truncated and complete) models to xfy data of all given files at once, saves listings next to them
+       (named as the ones of NLREG), returns filename -> results of both models"""
+
+    x_list = []
+    y_list = []
+    for filename in filename_list:
+        x, y = load_xy(filename)
+        x_list.append(x)
+        y_list.append(y)
+
+    result_dict = {filename: {} for filename in filename_list}
+
+    for model in ['truncated', 'complete']:
+        first_constr_list = [y[0] for y in y_list] if model == 'truncated' else None
+        for filename, result in zip(filename_list, fit_model_batch(model, x_list, y_list, first_constr_list)):
+            result_dict[filename][model] = result
+            save_report(result, filename, os.path.splitext(filename)[0] + '_' + model + '_nlreg.lst')
+
+    return result_dict
+
+
+def fit_nlreg(input_file):
+    """fits both (truncated and complete) models to xfy data of a file, saves listings next to it (named as the ones of NLREG),
+       returns results of both models"""
+
+    x, y = load_xy(input_file)
+    result_dict = {}
+
+    for model in ['truncated', 'complete']:
+        result_dict[model] = fit_model(model, x, y, y[0] if model == 'truncated' else None)
+        save_report(result_dict[model], input_file, os.path.splitext(input_file)[0] + '_' + model + '_nlreg.lst')
+
+    return result_dict
@@ -0,0 +1,50 @@
+# OUTPUT OF QUANTIFIED DATA SHARED BY THE SYNTACTIC, WORD AND CHARACTER LEVELS
+# rows are collected and written in large blocks instead of one print() per row (values are converted to strings
+# only when a block is written), the files are identical to the ones written row by row (tab-separated values converted by str())
+
+
+# number of rows collected before they are written
+BLOCK_SIZE = 1024
+
+
+class TableWriter:
+    """writes rows of a table with a given header into a tab-separated file, rows are collected
+       and written in blocks of block_size rows (+ the rest when the writer is closed)"""
+
+    def __init__(self, output_file, header, block_size=BLOCK_SIZE):
+        self.output = open(output_file, mode='w', encoding='utf-8')
+        self.header = header
+        self.block_size = block_size
+        self.rows = []
+
+        self.output.write('\t'.join(header) + '\n')  # header
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def add(self, row):
+        """adds a row (a list of values)"""
+
+        self.rows.append(row)
+
+        if len(self.rows) >= self.block_size:
+            self.flush()
+
+    def flush(self):
+        """converts collected rows to strings and writes them as one block"""
+
+        if not self.rows:
+            return
+
+        self.output.write('\n'.join(['\t'.join(map(str, row)) for row in self.rows]) + '\n')
+        self.rows = []
+
+    def close(self):
+        """writes the rest of the rows and closes the file"""
+
+        if not self.output.closed:
+            self.flush()
+            self.output.close()
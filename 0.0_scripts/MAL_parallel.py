@@ -0,0 +1,117 @@
+# PARALLEL PROCESSING OF SEVERAL CORPORA: (CORPUS x GROUP OF MEASURES) TASKS PROCESSED BY A POOL OF PROCESSES
+# treebanks are parsed and the character table is compiled (both cached, see MAL_columnar_treebank and MAL_character_table)
+# before the pool is started, the processes memory-map the caches, i.e. parsed data are shared read-only among them,
+# each task writes its files into its own directory (output_directory/corpus/group), so that tasks cannot overwrite each other
+
+
+from concurrent.futures import ProcessPoolExecutor
+import os
+import time
+import MAL_columnar_treebank
+import MAL_engine as E
+import MAL_syntactic_level as S
+import MAL_word_level as W
+import MAL_character_level as C
+import MAL_character_table as CT
+import MAL_variants as V
+import MAL_nlreg as nlr
+
+
+# measures of a group are processed during a single pass through a treebank
+MEASURE_GROUPS = {'syntactic': list(S.SYNTACTIC_MEASURES),
+                  'word': list(W.WORD_MEASURES),
+                  'character': list(C.CHARACTER_MEASURES)}
+
+
+class Task:
+    """a group of measures of a corpus processed by a process of the pool,
+       cache_directory == the directory of the cached columnar treebank of the corpus"""
+
+    def __init__(self, corpus, group, measure_names, cache_directory, output_directory):
+        self.corpus = corpus
+        self.group = group
+        self.measure_names = measure_names
+        self.cache_directory = cache_directory
+        self.output_directory = output_directory
+
+
+def prepare_caches(corpus_dict):
+    """parses treebanks (corpus -> conllu file) and compiles the character table if their caches do not exist yet,
+       returns corpus -> the directory of the cached treebank and absolute paths of the character sources"""
+
+    cache_dict = {}
+
+    for corpus, treebank_file in corpus_dict.items():
+        MAL_columnar_treebank.load_cached_treebank(treebank_file)
+        cache_dict[corpus] = os.path.abspath(MAL_columnar_treebank.create_cache_directory(treebank_file))
+
+    blcu_file = os.path.abspath(CT.BLCU_FILE)
+    chise_file = os.path.abspath(CT.CHISE_FILE) if os.path.isfile(CT.CHISE_FILE) else None
+    CT.load_cached_character_table(blcu_file, chise_file)
+
+    return cache_dict, blcu_file, chise_file
+
+
+def create_tasks(cache_dict, output_directory, measure_groups=None):
+    """returns one task per corpus and group of measures (MEASURE_GROUPS by default, group -> names of measures)"""
+
+    if measure_groups is None:
+        measure_groups = MEASURE_GROUPS
+
+    task_list = []
+
+    for corpus, cache_directory in cache_dict.items():
+        for group, measure_names in measure_groups.items():
+            for measure_name in measure_names:
+                if measure_name not in V.ALL_MEASURES:
+                    raise ValueError('ERROR! Unknown measure: ' + measure_name)
+            task_list.append(Task(corpus, group, measure_names, cache_directory,
+                                  os.path.abspath(os.path.join(output_directory, corpus, group))))
+
+    return task_list
+
+
+def initialize_process(blcu_file, chise_file):
+    """loads the cached character table in a process of the pool, i.e. the table does not depend on its working directory"""
+
+    CT.LOADED_TABLE['table'] = CT.load_cached_character_table(blcu_file, chise_file)
+
+
+def run_task(task, weighted_avg_limit, fit):
+    """processes measures of a task in its output directory (+ fits both models to non-empty xfy files),
+       returns [corpus, group, output directory, time in seconds]"""
+
+    start = time.perf_counter()
+    working_directory = os.getcwd()
+    os.makedirs(task.output_directory, exist_ok=True)
+    os.chdir(task.output_directory)
+
+    try:
+        a_treebank = MAL_columnar_treebank.load_columnar_treebank(task.cache_directory)
+        summary_list = E.export_measures(a_treebank, weighted_avg_limit, [V.ALL_MEASURES[name] for name in task.measure_names])
+
+        if fit:
+            filename_list = []
+            for summary in summary_list:
+                filename_list.extend(summary.token_files[1:])
+                if summary.type_files is not None:
+                    filename_list.extend(summary.type_files[1:])
+            # checks content of a file if it is not empty (see MAL_main.process_nlreg_data)
+            nlr.fit_nlreg_batch([filename for filename in filename_list
+                                 if os.path.isfile(filename) and len(nlr.load_xfy_file(filename)) > 1])
+    finally:
+        os.chdir(working_directory)
+
+    return [task.corpus, task.group, task.output_directory, time.perf_counter() - start]
+
+
+def process_corpora(corpus_dict, output_directory, measure_groups=None, weighted_avg_limit=10, fit=True, process_n=None):
+    """processes given corpora (corpus -> conllu file) by a pool of processes (process_n == None -> all CPUs),
+       one task per corpus and group of measures, files of a task are created in output_directory/corpus/group,
+       returns [corpus, group, output directory, time in seconds] of each task"""
+
+    cache_dict, blcu_file, chise_file = prepare_caches(corpus_dict)
+    task_list = create_tasks(cache_dict, output_directory, measure_groups)
+
+    with ProcessPoolExecutor(process_n, initializer=initialize_process, initargs=(blcu_file, chise_file)) as executor:
+        return list(executor.map(run_task, task_list, [weighted_avg_limit] * len(task_list), [fit] * len(task_list)))
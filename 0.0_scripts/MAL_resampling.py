@@ -0,0 +1,254 @@
+# RESAMPLING OF QUANTIFIED DATA: BOOTSTRAP CONFIDENCE INTERVALS FOR PARAMETERS OF MAL'S MODELS + PERMUTATION NULL MODEL
+# quantified data of tokens (files created by the levels, e.g. clause_word_character_cut.txt) are resampled,
+# xfy of each replicate is aggregated by bincount and both models are refitted by the built-in fitter (see MAL_nlreg),
+# replicates are processed in chunks by a pool of processes
+
+
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import MAL_nlreg as nlr
+import MAL_xfy as xfy
+
+
+# data of the token table shared by the processes of the pool (set by the initializer of each process)
+SHARED_DATA = {}
+
+
+class TokenTable:
+    """construct and constituent lengths of quantified data of tokens + an index of a sentence for each token"""
+
+    def __init__(self, sentence_index, construct, constituent):
+        self.sentence_index = sentence_index
+        self.construct = construct
+        self.constituent = constituent
+        self.sentence_n = int(sentence_index.max()) + 1 if len(sentence_index) > 0 else 0
+
+
+def load_token_table(input_file, construct_column, constituent_column):
+    """loads quantified data of tokens, records where construct or constituent lengths equal zero are filtered out
+       (== calculate_xfy)"""
+
+    input_df = pd.read_csv(input_file, delimiter='\t', dtype={'sent_id': str})
+    input_df = input_df[(input_df[construct_column] != 0) & (input_df[constituent_column] != 0)]
+
+    sentence_index = pd.factorize(input_df['sent_id'])[0]
+
+    return TokenTable(sentence_index.astype(np.int64), input_df[construct_column].to_numpy(dtype=np.int64),
+                      input_df[constituent_column].to_numpy(dtype=np.int64))
+
+
+def aggregate_xfy(construct, constituent, weights=None):
+    """returns construct lengths, their frequencies and average constituent lengths (== xfy) of tokens,
+       weights == the number of times each token is drawn (None == each token once)"""
+
+    frequency = np.bincount(construct, weights=weights)
+    constituent_sum = np.bincount(construct, weights=constituent if weights is None else weights * constituent)
+    x = np.flatnonzero(frequency)
+
+    return x, frequency[x], constituent_sum[x] / frequency[x] / x
+
+
+def create_replicate_xy(x, frequency, y, weighted_avg_limit=None):
+    """returns x and y of a replicate to be fitted, weighted_avg_limit -> weighted xfy (see MAL_xfy.pool_xfy)"""
+
+    if weighted_avg_limit is None:
+        return x.astype(np.float64), y
+
+    pooled_x, pooled_frequency, pooled_y, pooled = xfy.pool_xfy(x, frequency, y, [weighted_avg_limit])[0]
+
+    return pooled_x, pooled_y
+
+
+def fit_xy_list(x_list, y_list):
+    """fits both models to a list of series, returns model -> array of [parameters..., R^2] (one row per series)"""
+
+    fit_dict = {}
+
+    for model in ['truncated', 'complete']:
+        first_constr_list = [y[0] for y in y_list] if model == 'truncated' else None
+        result_list = nlr.fit_model_batch(model, x_list, y_list, first_constr_list)
+        fit_dict[model] = np.array([result.parameters + [result.r_squared] for result in result_list])
+
+    return fit_dict
+
+
+def initialize_process(token_table, weighted_avg_limit):
+    """shares the token table with a process of the pool"""
+
+    SHARED_DATA['token_table'] = token_table
+    SHARED_DATA['weighted_avg_limit'] = weighted_avg_limit
+
+
+def bootstrap_chunk(seed, replicate_n, unit):
+    """draws a chunk of bootstrap replicates (unit == 'sentence' or 'token') and fits both models to each of them"""
+
+    token_table = SHARED_DATA['token_table']
+    generator = np.random.default_rng(seed)
+    x_list = []
+    y_list = []
+
+    for _ in range(replicate_n):
+        if unit == 'sentence':
+            # the number of times each sentence is drawn, all tokens of a sentence are drawn together
+            sentence_weights = generator.multinomial(token_table.sentence_n, np.full(token_table.sentence_n, 1 / token_table.sentence_n))
+            weights = sentence_weights[token_table.sentence_index].astype(np.float64)
+        else:
+            weights = np.bincount(generator.integers(0, len(token_table.construct), len(token_table.construct)),
+                                  minlength=len(token_table.construct)).astype(np.float64)
+        x, frequency, y = aggregate_xfy(token_table.construct, token_table.constituent, weights)
+        x, y = create_replicate_xy(x, frequency, y, SHARED_DATA['weighted_avg_limit'])
+        x_list.append(x)
+        y_list.append(y)
+
+    return fit_xy_list(x_list, y_list)
+
+
+def bootstrap(input_file, construct_column, constituent_column, replicate_n=10000, unit='sentence', weighted_avg_limit=None,
+              confidence=0.95, seed=0, process_n=None, chunk_size=250):
+    """bootstrap confidence intervals (percentile method) for parameters of both models and R^2,
+       quantified data of tokens are resampled by sentences (unit='sentence') or by tokens (unit='token'),
+       weighted_avg_limit -> models are fitted to weighted xfy, process_n == the number of processes (None == all CPUs),
+       returns model -> parameter (+ 'R^2') -> [estimate, lower bound, upper bound]"""
+
+    if unit not in ['sentence', 'token']:
+        raise ValueError('Unknown unit of resampling: ' + unit)
+
+    token_table = load_token_table(input_file, construct_column, constituent_column)
+
+    # estimates of the original data
+    x, frequency, y = aggregate_xfy(token_table.construct, token_table.constituent)
+    x, y = create_replicate_xy(x, frequency, y, weighted_avg_limit)
+    estimate_dict = fit_xy_list([x], [y])
+
+    chunk_list = [chunk_size] * (replicate_n // chunk_size) + ([replicate_n % chunk_size] if replicate_n % chunk_size else [])
+    seed_list = np.random.SeedSequence(seed).spawn(len(chunk_list))
+
+    with ProcessPoolExecutor(process_n, initializer=initialize_process, initargs=(token_table, weighted_avg_limit)) as executor:
+        chunk_result_list = list(executor.map(bootstrap_chunk, seed_list, chunk_list, [unit] * len(chunk_list)))
+
+    interval_dict = {}
+    alpha = (1 - confidence) / 2
+
+    for model in ['truncated', 'complete']:
+        replicate_values = np.concatenate([chunk_result[model] for chunk_result in chunk_result_list])
+        names = nlr.MODELS[model][1] + ['R^2']
+        interval_dict[model] = {}
+        for index, name in enumerate(names):
+            values = replicate_values[:, index]
+            values = values[np.isfinite(values)]
+            lower, upper = np.quantile(values, [alpha, 1 - alpha]) if len(values) > 0 else [float('nan'), float('nan')]
+            interval_dict[model][name] = [float(estimate_dict[model][0, index]), float(lower), float(upper)]
+
+    return interval_dict
+
+
+def save_bootstrap_report(interval_dict, output_file):
+    """saves confidence intervals created by bootstrap"""
+
+    with open(output_file, mode='w', encoding='utf-8') as output:
+        print('model' + '\t' + 'parameter' + '\t' + 'estimate' + '\t' + 'lower' + '\t' + 'upper', file=output)  # header
+
+        for model, parameter_dict in interval_dict.items():
+            for name, (estimate, lower, upper) in parameter_dict.items():
+                print(model + '\t' + name + '\t' + str(estimate) + '\t' + str(lower) + '\t' + str(upper), file=output)
+
+
+# PERMUTATION NULL MODEL
+# mean constituent lengths of constructs (constituent / construct, e.g. characters per word of a clause) are shuffled
+# across constructs (all tokens or tokens of the same sentence) and total constituent lengths are rebuilt
+# (shuffled mean * construct), i.e. any relation between construct length and mean constituent length is destroyed,
+# so that b of the null model is centred on 0 (shuffling totals instead would force y ~ 1/x, i.e. b ~ -1)
+def permutation_chunk(seed, permutation_n, scheme):
+    """draws a chunk of permutations (scheme == 'global' or 'sentence') and fits both models to each of them"""
+
+    token_table = SHARED_DATA['token_table']
+    generator = np.random.default_rng(seed)
+    x_list = []
+    y_list = []
+
+    # original positions of rows sorted by sentences (rows of a sentence need not be contiguous)
+    positions = np.argsort(token_table.sentence_index, kind='stable')
+    mean_constituent = token_table.constituent / token_table.construct
+
+    for _ in range(permutation_n):
+        if scheme == 'global':
+            permuted_mean = generator.permutation(mean_constituent)
+        else:
+            # sorted by sentences and random keys within them == a permutation within each sentence,
+            # shuffled means are put back to the positions of rows of the same sentence
+            order = np.lexsort((generator.random(len(mean_constituent)), token_table.sentence_index))
+            permuted_mean = np.empty_like(mean_constituent)
+            permuted_mean[positions] = mean_constituent[order]
+        x, frequency, y = aggregate_xfy(token_table.construct, permuted_mean * token_table.construct)
+        x, y = create_replicate_xy(x, frequency, y, SHARED_DATA['weighted_avg_limit'])
+        x_list.append(x)
+        y_list.append(y)
+
+    return fit_xy_list(x_list, y_list)
+
+
+def permutation_test(input_file, construct_column, constituent_column, permutation_n=1000, scheme='global', weighted_avg_limit=None,
+                     seed=0, process_n=None, chunk_size=250):
+    """empirical p-values of the parameter b of both models under the null model (mean constituent lengths of constructs
+       shuffled across constructs, i.e. b is centred on 0),
+       p-value == the proportion of permutations with b lower than or equal to the observed one (== a negative trend, MAL),
+       scheme='global' -> shuffled among all tokens, scheme='sentence' -> shuffled within sentences
+       (needs several constructs per sentence, i.e. not applicable to the sentence level with one row per sentence),
+       returns model -> [observed b, p-value, mean of b under the null model]"""
+
+    if scheme not in ['global', 'sentence']:
+        raise ValueError('Unknown scheme of permutation: ' + scheme)
+
+    token_table = load_token_table(input_file, construct_column, constituent_column)
+
+    # one row per sentence -> the permutation within sentences is the identity
+    if scheme == 'sentence' and token_table.sentence_n == len(token_table.sentence_index):
+        raise ValueError('ERROR! Permutation within sentences needs several rows per sentence (' + input_file + ').')
+
+    x, frequency, y = aggregate_xfy(token_table.construct, token_table.constituent)
+    x, y = create_replicate_xy(x, frequency, y, weighted_avg_limit)
+    observed_dict = fit_xy_list([x], [y])
+
+    chunk_list = [chunk_size] * (permutation_n // chunk_size) + ([permutation_n % chunk_size] if permutation_n % chunk_size else [])
+    seed_list = np.random.SeedSequence(seed).spawn(len(chunk_list))
+
+    with ProcessPoolExecutor(process_n, initializer=initialize_process, initargs=(token_table, weighted_avg_limit)) as executor:
+        chunk_result_list = list(executor.map(permutation_chunk, seed_list, chunk_list, [scheme] * len(chunk_list)))
+
+    p_value_dict = {}
+
+    for model in ['truncated', 'complete']:
+        b_index = nlr.MODELS[model][1].index('b')
+        observed_b = float(observed_dict[model][0, b_index])
+        null_b = np.concatenate([chunk_result[model] for chunk_result in chunk_result_list])[:, b_index]
+        null_b = null_b[np.isfinite(null_b)]
+        p_value = (1 + np.sum(null_b <= observed_b)) / (1 + len(null_b))
+        p_value_dict[model] = [observed_b, float(p_value), float(np.mean(null_b)) if len(null_b) > 0 else float('nan')]
+
+    return p_value_dict
+
+
+def permutation_tests(input_list, permutation_n=1000, scheme='global', weighted_avg_limit=None, seed=0, process_n=None):
+    """permutation tests of several files of quantified data of tokens, input_list == [[file, construct_column, constituent_column], ...],
+       returns file -> model -> [observed b, p-value, mean of b under the null model]"""
+
+    result_dict = {}
+
+    for input_file, construct_column, constituent_column in input_list:
+        result_dict[input_file] = permutation_test(input_file, construct_column, constituent_column, permutation_n, scheme,
+                                                   weighted_avg_limit, seed, process_n)
+
+    return result_dict
+
+
+def save_permutation_report(result_dict, output_file):
+    """saves p-values created by permutation_tests, the null model is centred on b == 0 (no relation between construct length
+       and mean constituent length), null_mean_b == the mean of b under the null model"""
+
+    with open(output_file, mode='w', encoding='utf-8') as output:
+        print('file' + '\t' + 'model' + '\t' + 'b' + '\t' + 'p_value' + '\t' + 'null_mean_b', file=output)  # header
+
+        for input_file, model_dict in result_dict.items():
+            for model, (observed_b, p_value, null_mean) in model_dict.items():
+                print(input_file + '\t' + model + '\t' + str(observed_b) + '\t' + str(p_value) + '\t' + str(null_mean), file=output)
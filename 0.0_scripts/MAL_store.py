@@ -0,0 +1,181 @@
+# COLUMNAR RESULT STORE: TABLES OF TOKENS AND TYPES OF A CORPUS IN ONE PARQUET DATASET (OPTIONAL, REQUIRES PYARROW)
+# the dataset of a corpus is partitioned by measure, variant and table (token/type), e.g.
+# store_directory/measure=c_phrase_word_character_cut/variant=none/table=type/part-0.parquet,
+# construct and constituent lengths are stored as integers, text columns are dictionary-encoded,
+# the tables are created by E.export_measures(..., store=ResultStore(store_directory)) instead of the files of tokens and types,
+# the original tab-separated files can be exported from the store again (export_tsv)
+
+
+import os
+import pandas as pd
+import MAL_variants as V
+
+
+# variant of a measure without switches (partition values cannot be empty)
+NO_VARIANT = 'none'
+
+# number of rows of a row group of a parquet file
+ROW_GROUP_SIZE = 65536
+
+
+def import_pyarrow():
+    """returns pyarrow and its parquet module, the store is optional, i.e. pyarrow is imported only when the store is used"""
+
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as error:
+        raise ImportError('ERROR! The result store requires pyarrow (pip install pyarrow).') from error
+
+    return pyarrow, pyarrow.parquet
+
+
+def create_partition_directory(store_directory, measure_name, variant, table):
+    """returns the directory of a table of a measure (table == 'token' or 'type')"""
+
+    return os.path.join(store_directory, 'measure=' + measure_name, 'variant=' + (variant if variant else NO_VARIANT), 'table=' + table)
+
+
+class StoreWriter:
+    """writes rows of a table of a measure into the store, rows are collected and written in row groups
+       (same interface as MAL_output.TableWriter), integer_columns == columns stored as integers"""
+
+    def __init__(self, output_file, header, integer_columns, row_group_size=ROW_GROUP_SIZE):
+        self.pyarrow, self.parquet = import_pyarrow()
+        self.output_file = output_file
+        self.header = header
+        self.row_group_size = row_group_size
+        self.rows = []
+
+        fields = []
+        for column in header:
+            if column in integer_columns:
+                fields.append(self.pyarrow.field(column, self.pyarrow.int32()))
+            else:
+                fields.append(self.pyarrow.field(column, self.pyarrow.dictionary(self.pyarrow.int32(), self.pyarrow.string())))
+        self.schema = self.pyarrow.schema(fields)
+
+        os.makedirs(os.path.dirname(output_file), exist_ok=True)
+        self.output = self.parquet.ParquetWriter(output_file, self.schema)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def add(self, row):
+        """adds a row (a list of values)"""
+
+        self.rows.append(row)
+
+        if len(self.rows) >= self.row_group_size:
+            self.flush()
+
+    def flush(self):
+        """converts collected rows to columns and writes them as one row group"""
+
+        if not self.rows:
+            return
+
+        arrays = []
+        for field, column in zip(self.schema, zip(*self.rows)):
+            if self.pyarrow.types.is_integer(field.type):
+                arrays.append(self.pyarrow.array(column, type=field.type))
+            else:
+                arrays.append(self.pyarrow.array([str(value) for value in column], type=self.pyarrow.string()).dictionary_encode())
+
+        self.output.write_table(self.pyarrow.Table.from_arrays(arrays, schema=self.schema))
+        self.rows = []
+
+    def close(self):
+        """writes the rest of the rows and closes the file"""
+
+        if self.output is not None:
+            self.flush()
+            self.output.close()
+            self.output = None
+
+
+class ResultStore:
+    """the dataset of tables of tokens and types of a corpus (see E.export_measures)"""
+
+    def __init__(self, store_directory):
+        self.store_directory = store_directory
+
+    def create_writer(self, measure, table):
+        """returns a writer of a table of a measure (table == 'token' or 'type')"""
+
+        output_file = os.path.join(create_partition_directory(self.store_directory, measure.name, measure.variant, table), 'part-0.parquet')
+
+        return StoreWriter(output_file, measure.header, [measure.construct_column, measure.constituent_column])
+
+
+def list_tables(store_directory):
+    """returns [measure, variant, table] of all the tables of the store"""
+
+    table_list = []
+
+    for measure_partition in sorted(os.listdir(store_directory)):
+        for variant_partition in sorted(os.listdir(os.path.join(store_directory, measure_partition))):
+            for table_partition in sorted(os.listdir(os.path.join(store_directory, measure_partition, variant_partition))):
+                table_list.append([partition.split('=', 1)[1] for partition in [measure_partition, variant_partition, table_partition]])
+
+    return table_list
+
+
+def load_table(store_directory, measure_name, variant='', table='token', columns=None):
+    """loads a table of a measure as a pandas data frame, only given columns (all of them by default) are read"""
+
+    pyarrow, parquet = import_pyarrow()
+    partition_directory = create_partition_directory(store_directory, measure_name, variant, table)
+
+    if not os.path.isdir(partition_directory):
+        raise ValueError('ERROR! Table ' + table + ' of ' + measure_name + ' (' + (variant if variant else NO_VARIANT) + ') is not in '
+                         + store_directory + '.')
+
+    return parquet.read_table(os.path.join(partition_directory, 'part-0.parquet'), columns=columns).to_pandas()
+
+
+def load_corpora(store_dict, measure_name, variant='', table='token', columns=None):
+    """loads a table of a measure of several corpora (corpus -> store directory) as one pandas data frame
+       with a column 'corpus', only given columns (all of them by default) are read"""
+
+    df_list = []
+
+    for corpus, store_directory in store_dict.items():
+        corpus_df = load_table(store_directory, measure_name, variant, table, columns)
+        corpus_df.insert(0, 'corpus', corpus)
+        df_list.append(corpus_df)
+
+    corpora_df = pd.concat(df_list, ignore_index=True)
+    corpora_df['corpus'] = corpora_df['corpus'].astype('category')
+
+    return corpora_df
+
+
+def export_tsv(store_directory, output_directory='.'):
+    """exports all the tables of the store into tab-separated files named as by E.export_measures
+       (identical to the files created without the store), returns names of the files"""
+
+    pyarrow, parquet = import_pyarrow()
+    filename_list = []
+
+    for measure_name, variant, table in list_tables(store_directory):
+        measure = V.ALL_MEASURES[measure_name]
+        if variant != NO_VARIANT:
+            measure = measure.create_variant(variant)
+        output_file = os.path.join(output_directory, measure.filename(measure.token_name if table == 'token' else measure.type_name))
+
+        parquet_file = parquet.ParquetFile(os.path.join(create_partition_directory(store_directory, measure_name, variant, table),
+                                                        'part-0.parquet'))
+        with open(output_file, mode='w', encoding='utf-8') as output:
+            output.write('\t'.join(parquet_file.schema_arrow.names) + '\n')  # header
+            for index in range(parquet_file.num_row_groups):
+                columns = [[str(value) for value in column.to_pylist()] for column in parquet_file.read_row_group(index).columns]
+                if columns and columns[0]:
+                    output.write('\n'.join(['\t'.join(row) for row in zip(*columns)]) + '\n')
+
+        filename_list.append(output_file)
+
+    return filename_list
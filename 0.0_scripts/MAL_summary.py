@@ -0,0 +1,141 @@
+# SUMMARIES OF QUANTIFIED DATA, I.E. SUFFICIENT STATISTICS OF XFY WHICH CAN BE SAVED AND MERGED
+# a summary of a corpus contains for each measure (and its variant) the number of constructs, the sum and the sum of squares
+# of constituent lengths for each construct length + types (type key -> construct and constituent lengths),
+# summaries of corpora (or their parts) are combined associatively, e.g. PUD == PUD-N + PUD-W,
+# xfy of the combined corpora is then created without processing the treebanks again
+
+
+import json
+import numpy as np
+import MAL_xfy as xfy
+
+
+class MeasureSummary:
+    """summary of a measure, token_files == names of files of tokens, i.e. [data, xfy, weighted xfy],
+       type_files == names of files of types (None == types are not processed)"""
+
+    def __init__(self, token_files, type_files=None):
+        self.token_files = token_files
+        self.type_files = type_files
+        self.token_xfy = xfy.XfyAccumulator()
+        self.type_dict = {} if type_files is not None else None  # type key -> [construct, constituent]
+
+    def add_type(self, type_key, construct, constituent):
+        """adds a type if it is not there yet, returns True for a new type"""
+
+        if type_key in self.type_dict:
+            return False
+
+        self.type_dict[type_key] = [construct, constituent]
+
+        return True
+
+    def create_type_xfy(self):
+        """returns an accumulator of types"""
+
+        type_xfy = xfy.XfyAccumulator()
+
+        for construct, constituent in self.type_dict.values():
+            type_xfy.add(construct, constituent)
+
+        return type_xfy
+
+    def merge(self, other):
+        """adds another summary of the same measure to this one"""
+
+        if self.token_files != other.token_files:
+            raise ValueError('ERROR! Summaries of ' + self.token_files[0] + ' and ' + other.token_files[0] + ' cannot be merged.')
+
+        self.token_xfy.merge(other.token_xfy)
+
+        if self.type_dict is not None:
+            for type_key, (construct, constituent) in other.type_dict.items():
+                self.add_type(type_key, construct, constituent)
+
+        return self
+
+    def save_xfy(self, weighted_avg_limit):
+        """creates files with xfy for original and weighted values (+ types if applicable)"""
+
+        self.token_xfy.save_xfy(self.token_files[1])
+        self.token_xfy.save_weighted_xfy([self.token_files[2]], [weighted_avg_limit])
+
+        if self.type_files is not None:
+            type_xfy = self.create_type_xfy()
+            type_xfy.save_xfy(self.type_files[1])
+            type_xfy.save_weighted_xfy([self.type_files[2]], [weighted_avg_limit])
+
+    def to_dict(self):
+        """returns the summary as a dictionary (to be saved in json)"""
+
+        self.token_xfy.flush()
+        a_dict = {'token_files': self.token_files,
+                  'type_files': self.type_files,
+                  'count': self.token_xfy.count.tolist(),
+                  'sum': self.token_xfy.sum.tolist(),
+                  'sumsq': self.token_xfy.sumsq.tolist(),
+                  'types': None}
+
+        if self.type_dict is not None:
+            a_dict['types'] = [[type_key, construct, constituent] for type_key, (construct, constituent) in self.type_dict.items()]
+
+        return a_dict
+
+
+def create_measure_summary(a_dict):
+    """creates a summary of a measure from a dictionary created by MeasureSummary.to_dict"""
+
+    a_summary = MeasureSummary(a_dict['token_files'], a_dict['type_files'])
+    a_summary.token_xfy.count = np.array(a_dict['count'], dtype=np.int64)
+    a_summary.token_xfy.sum = np.array(a_dict['sum'], dtype=np.int64)
+    a_summary.token_xfy.sumsq = np.array(a_dict['sumsq'], dtype=np.int64)
+
+    if a_dict['types'] is not None:
+        for type_key, construct, constituent in a_dict['types']:
+            a_summary.type_dict[type_key] = [construct, constituent]
+
+    return a_summary
+
+
+def save_summary(summary_list, filename):
+    """saves summaries of measures of a corpus into a json file"""
+
+    with open(filename, mode='w', encoding='utf-8') as output:
+        json.dump([a_summary.to_dict() for a_summary in summary_list], output, ensure_ascii=False)
+
+
+def load_summary(filename):
+    """loads summaries of measures of a corpus saved by save_summary"""
+
+    with open(filename, mode='r', encoding='utf-8') as data:
+        return [create_measure_summary(a_dict) for a_dict in json.load(data)]
+
+
+def merge_summaries(summary_list_list):
+    """combines summaries of several corpora (or their parts), measures are matched by names of their files,
+       the order of the corpora does not matter (except for the order of measures, taken from the first occurrence)"""
+
+    merged_dict = {}
+
+    for summary_list in summary_list_list:
+        for a_summary in summary_list:
+            if a_summary.token_files[0] not in merged_dict:
+                merged_dict[a_summary.token_files[0]] = MeasureSummary(a_summary.token_files, a_summary.type_files)
+            merged_dict[a_summary.token_files[0]].merge(a_summary)
+
+    return list(merged_dict.values())
+
+
+def export_summary_xfy(summary_filename_list, weighted_avg_limit, output_filename=None):
+    """combines saved summaries of corpora, creates files with xfy for original and weighted values (+ types if applicable),
+       output_filename -> the combined summary is saved as well (so that further corpora can be added later)"""
+
+    merged_list = merge_summaries([load_summary(filename) for filename in summary_filename_list])
+
+    for a_summary in merged_list:
+        a_summary.save_xfy(weighted_avg_limit)
+
+    if output_filename is not None:
+        save_summary(merged_list, output_filename)
+
+    return merged_list
@@ -2,7 +2,10 @@
 # sentence, clause and phrase as constructs
 
 
-import pandas as pd
+import hashlib
+from itertools import zip_longest
+import MAL_engine as E
+import MAL_output
 import MAL_xfy as xfy
 import MAL_UD_parser
 
@@ -11,12 +14,7 @@ import MAL_UD_parser
 def count_characters(word):
     """counts characters of all children belonging to a given word"""
 
-    character_n = 0
-
-    for child in word.all_children:
-        character_n += len(child.form)
-
-    return character_n
+    return MAL_UD_parser.count_all_children_length(word)
 
 
 def create_string(a_word_list):
@@ -30,6 +28,33 @@ def create_string(a_word_list):
     return word_form_string
 
 
+# interned word forms, i.e. form -> its id used in fingerprints of form sequences,
+# ids are hashes of the forms, so that fingerprints are the same in all processes (see MAL_summary)
+FORM_ID_DICT = {}
+
+FINGERPRINT_MULTIPLIER = 0x100000001B3  # 64-bit FNV prime
+FINGERPRINT_MASK = 0xFFFFFFFFFFFFFFFF
+
+
+class FormSequence:
+    """word forms of a sequence of word nodes (e.g. a phrase, lds) identified by a 64-bit fingerprint,
+       i.e. a rolling hash over ids of interned forms, the string (== create_string) is created only when it is written"""
+
+    def __init__(self, a_word_list):
+        self.word_list = a_word_list
+        self.fingerprint = 0xCBF29CE484222325  # 64-bit FNV offset basis
+
+        for word_node in a_word_list:
+            form_id = FORM_ID_DICT.get(word_node.form)
+            if form_id is None:
+                form_id = int.from_bytes(hashlib.blake2b(word_node.form.encode('utf-8'), digest_size=8).digest(), 'little')
+                FORM_ID_DICT[word_node.form] = form_id
+            self.fingerprint = ((self.fingerprint ^ form_id) * FINGERPRINT_MULTIPLIER) & FINGERPRINT_MASK
+
+    def __str__(self):
+        return create_string(self.word_list)
+
+
 def stringify_non_clausal_children(direct_children):
     """recursively creates a string of all children which do not belong to other clauses (==CUTS)"""
 
@@ -118,58 +143,65 @@ def identify_1CS(a_word_list):
         return False
 
 
-def process_types(input_file, output_file, column_name):
-    """loads quantified data of word tokens, drops duplicates, saves quantified data for phrase types"""
+# CORE FUNCTIONS ACCORDING TO LEVELS
+# each measure consists of a function creating its rows for a given sentence (==a SentenceData object, see ENGINE)
+# and a function processing a whole treebank, all the measures can be processed at once by export_syntactic_measures,
+# keyword arguments of the row functions switch between variants of the measures (see MAL_variants)
+#____________________________________________________________________________SENTENCE____________________________________________________________________________#
+def sentence_clause_word_cut_rows(data, state):
+    """x==sentence length in the number of clauses, y==clause length in the number of words"""
 
-    token_df = pd.read_csv(input_file, delimiter='\t')
-    type_df = token_df.drop_duplicates(subset=[column_name])
-    type_df.to_csv(path_or_buf=output_file, sep='\t', index=False)
+    clause_n = len(data.clause_heads)  # number of words commented as 'clause'
+
+    for word in data.root_list:
+        state['word_n'] = word.subtree_size + 1  # number of all root's children + root (including itself)
+
+    return [[data.sentence.id, data.sentence.text, clause_n, state.get('word_n', 0)]]
 
 
-# CORE FUNCTIONS ACCORDING TO LEVELS
-#____________________________________________________________________________SENTENCE____________________________________________________________________________#
 def sentence_clause_word_cut(a_treebank, weighted_avg_limit):
     """quantifies a UD treebank on the sentence level, creates files with data quantification, xfy for original and weighted values,
        x==sentence length in the number of clauses, f(x)==its frequency, y==clause length in the number of words"""
 
-    clause_n = 0  # number of words commented as 'clause'
-    word_n = 0  # number of all root's children + root
+    export_syntactic_measures(a_treebank, weighted_avg_limit, ['sentence_clause_word_cut'])
+
 
-    with open('sentence_clause_word_cut.txt', mode='w', encoding='utf-8') as output:
-        print('sent_id' + '\t' + 'sent_text' + '\t' + 'clause_n' + '\t' + 'word_n', file=output)  # header
+def sentence_phrase_word_rows(data, state):
+    """x==sentence length in the number of phrases, y==phrase length in the number of words"""
 
-        for sentence in a_treebank.sentence_list:
-            for word in sentence.word_list:
-                if word.comment == 'clause':
-                    clause_n += 1
-                if word.deprel == 'root':
-                    word_n = len(word.all_children) + 1  # including itself
-            print(sentence.id + '\t' + sentence.text + '\t' + str(clause_n) + '\t' + str(word_n), file=output)
-            clause_n = 0
+    rows = []
 
-    xfy.calculate_xfy('sentence_clause_word_cut.txt', 'sentence_clause_word_cut_xfy.txt', 'clause_n', 'word_n')
-    xfy.calculate_weighted_xfy('sentence_clause_word_cut_xfy.txt', 'sentence_clause_word_cut_xfy_weighted.txt', weighted_avg_limit)
+    for word in data.root_list:
+        phrase_n = len(word.direct_children)  # number of root's direct children
+        word_n = word.subtree_size  # number of root's all children (excluding root)
+        rows.append([data.sentence.id, data.sentence.text, phrase_n, word_n])
+
+    return rows
 
 
 def sentence_phrase_word(a_treebank, weighted_avg_limit):
     """quantifies a UD treebank on the sentence level, creates files with data quantification, xfy for original and weighted values,
        x==sentence length in the number of phrases, f(x)==its frequency, y==phrase length in the number of words"""
 
-    phrase_n = 0  # number of root's direct children
-    word_n = 0  # number of root's all children
+    export_syntactic_measures(a_treebank, weighted_avg_limit, ['sentence_phrase_word'])
+
 
-    with open('sentence_phrase_word.txt', mode='w', encoding='utf-8') as output:
-        print('sent_id' + '\t' + 'sent_text' + '\t' + 'phrase_n' + '\t' + 'word_n', file=output)  # header
+def sentence_clause_phrase_cut_rows(data, state, clauses_without_phrases_excl=False):
+    """x==sentence length in the number of clauses, y==clause length in the number of phrases (==CUTS),
+       clauses_without_phrases_excl=False -> APPROACH 1, clauses_without_phrases_excl=True -> APPROACH 2"""
 
-        for sentence in a_treebank.sentence_list:
-            for word in sentence.word_list:
-                if word.deprel == 'root':
-                    phrase_n = len(word.direct_children)
-                    word_n = len(word.all_children)  # excluding root
-                    print(sentence.id + '\t' + sentence.text + '\t' + str(phrase_n) + '\t' + str(word_n), file=output)
+    clause_n = 0  # number of words commented as 'clause'
+    phrase_n = 0  # number of direct children of the words commented as 'clause'
+
+    for word in data.clause_heads:
+        # APPROACH 1 -> if word.comment == 'clause':
+        # APPROACH 2 -> if word.comment == 'clause' and len(word.direct_children) != 0 and check_clausal_children(word):
+        if clauses_without_phrases_excl and (len(word.direct_children) == 0 or not check_clausal_children(word)):
+            continue
+        clause_n += 1
+        phrase_n += len(data.clause_phrases(word))
 
-    xfy.calculate_xfy('sentence_phrase_word.txt', 'sentence_phrase_word_xfy.txt', 'phrase_n', 'word_n')
-    xfy.calculate_weighted_xfy('sentence_phrase_word_xfy.txt', 'sentence_phrase_word_xfy_weighted.txt', weighted_avg_limit)
+    return [[data.sentence.id, data.sentence.text, clause_n, phrase_n]]
 
 
 def sentence_clause_phrase_cut(a_treebank, weighted_avg_limit):
@@ -179,59 +211,55 @@ def sentence_clause_phrase_cut(a_treebank, weighted_avg_limit):
        APPROACH 1: clauses with 0 phrase included -> clause_n += 1 & phrase_n += 0,
        APPROACH 2: clauses with 0 phrase excluded -> clause_n += 0 & phrase_n += 0"""
 
-    clause_n = 0  # number of words commented as 'clause'
-    phrase_n = 0  # number of direct children of the words commented as 'clause'
-
-    with open('sentence_clause_phrase_cut.txt', mode='w', encoding='utf-8') as output:
-        print('sent_id' + '\t' 'sent_text' + '\t' + 'clause_n' + '\t' + 'c_phrase_n', file=output)  # header
-
-        for sentence in a_treebank.sentence_list:
-            for word in sentence.word_list:
-                # APPROACH 1 -> if word.comment == 'clause':
-                # APPROACH 2 -> if word.comment == 'clause' and len(word.direct_children) != 0 and check_clausal_children(word):
-                if word.comment == 'clause':
-                    clause_n += 1
-                    for child in word.direct_children:
-                        if child.comment != 'clause':
-                            phrase_n += 1
-            print(sentence.id + '\t' + sentence.text + '\t' + str(clause_n) + '\t' + str(phrase_n), file=output)
-            clause_n = 0
-            phrase_n = 0
-
-    xfy.calculate_xfy('sentence_clause_phrase_cut.txt', 'sentence_clause_phrase_cut_xfy.txt', 'clause_n', 'c_phrase_n')
-    xfy.calculate_weighted_xfy('sentence_clause_phrase_cut_xfy.txt', 'sentence_clause_phrase_cut_xfy_weighted.txt', weighted_avg_limit)
+    export_syntactic_measures(a_treebank, weighted_avg_limit, ['sentence_clause_phrase_cut'])
 #____________________________________________________________________________theend____________________________________________________________________________#
 
 
 #____________________________________________________________________________CLAUSE____________________________________________________________________________#
+def clause_word_character_cut_rows(data, state, chinese_characters_only=False):
+    """x==clause length in the number of words, y==word length in the number of characters (==CUTS),
+       chinese_characters_only=True -> excluding clauses with non-Chinese graphemes"""
+
+    rows = []
+
+    for word in data.clause_heads:
+        clause_nodes = data.clause_nodes(word)
+        if chinese_characters_only and contain_ascii(clause_nodes + [word]):
+            continue
+        clause_words = create_string(clause_nodes) + word.form
+        word_n = len(clause_nodes) + 1  # including itself=head
+        character_n = data.clause_length(word) + len(word.form)  # including itself=head
+        rows.append([data.sentence.id, clause_words, word_n, character_n])
+
+    return rows
+
+
 def clause_word_character_cut(a_treebank, weighted_avg_limit):
     """quantifies a UD treebank on the clause level, creates files with data quantification, xfy for original and weighted values,
        x==clause length in the number of words, f(x)==its frequency, y==word length in the number of characters,
        each clause is processed separately (==CUTS)"""
 
-    word_n = 0  # number of all children of a word commented as 'clause' and not belonging to other clauses + clausal head
-    character_n = 0  # length of all children of the word commented as 'clause' and not belonging to other clauses + clausal head
+    export_syntactic_measures(a_treebank, weighted_avg_limit, ['clause_word_character_cut'])
+
+
+def clause_phrase_word_cut_rows(data, state, clausal_heads_incl=False):
+    """x==clause length in the number of phrases, y==phrase length in the number of words (==CUTS),
+       clausal_heads_incl=False -> APPROACH 1, clausal_heads_incl=True -> APPROACH 2"""
 
-    with open('clause_word_character_cut.txt', mode='w', encoding='utf-8') as output:
-        print('sent_id' + '\t' + 'clause_text' + '\t' + 'word_n' + '\t' + 'character_n', file=output)  # header
+    rows = []
 
-        for sentence in a_treebank.sentence_list:
-            for word in sentence.word_list:
-                if word.comment == 'clause':
-                    clause_words = stringify_non_clausal_children(word.direct_children)
-                    clause_words += word.form
-                    clause_nodes = list_non_clausal_children(word.direct_children)
-                    clause_nodes.append(word)
-                    # for excluding clauses with non-Chinese graphemes ->  if not contain_ascii(clause_nodes):
-                    word_n = len(clause_nodes)
-                    character_n = count_non_clausal_children_length(word.direct_children)
-                    character_n += len(word.form)  # including itself=head
-                    print(sentence.id + '\t' + clause_words + '\t' + str(word_n) + '\t' + str(character_n), file=output)
-                word_n = 0
-                character_n = 0
+    for word in data.clause_heads:
+        clause_nodes = data.clause_nodes(word)
+        clause_words = create_string(clause_nodes)  # excluding clausal heads
+        phrase_n = len(data.clause_phrases(word))  # excluding clausal heads
+        # APPROACH 1: word_n = len(clause_nodes)
+        # APPROACH 2: word_n = len(clause_nodes) + 1
+        word_n = len(clause_nodes)
+        if clausal_heads_incl:
+            word_n += 1
+        rows.append([data.sentence.id, clause_words, phrase_n, word_n])
 
-    xfy.calculate_xfy('clause_word_character_cut.txt', 'clause_word_character_cut_xfy.txt', 'word_n', 'character_n')
-    xfy.calculate_weighted_xfy('clause_word_character_cut_xfy.txt', 'clause_word_character_cut_xfy_weighted.txt', weighted_avg_limit)
+    return rows
 
 
 def clause_phrase_word_cut(a_treebank, weighted_avg_limit):
@@ -241,52 +269,51 @@ def clause_phrase_word_cut(a_treebank, weighted_avg_limit):
        APPROACH 1: excluding clausal heads -> word_n += 0,
        APPROACH 2: including clausal heads -> word_n += 1"""
 
-    phrase_n = 0  # number of direct children of a word commented as 'clause' (excluding other clauses)
-    word_n = 0  # number of all children of the word commented as 'clause' (excluding other clauses)
-
-    with open('clause_phrase_word_cut.txt', mode='w', encoding='utf-8') as output:
-        print('sent_id' + '\t' + 'clause_text' + '\t' + 'c_phrase_n' + '\t' + 'word_n', file=output)  # header
-
-        for sentence in a_treebank.sentence_list:
-            for word in sentence.word_list:
-                if word.comment == 'clause':
-                    clause_words = stringify_non_clausal_children(word.direct_children)  # excluding clausal heads
-                    for child in word.direct_children:
-                        if child.comment != 'clause':
-                            phrase_n += 1  # excluding clausal heads
-                    # APPROACH 1: word_n = count_non_clausal_children(word.direct_children)
-                    # APPROACH 2: word_n = count_non_clausal_children(word.direct_children)
-                    word_n = count_non_clausal_children(word.direct_children)
-                    print(sentence.id + '\t' + clause_words + '\t' + str(phrase_n) + '\t' + str(word_n), file=output)
-                    phrase_n = 0
-
-    xfy.calculate_xfy('clause_phrase_word_cut.txt', 'clause_phrase_word_cut_xfy.txt', 'c_phrase_n', 'word_n')
-    xfy.calculate_weighted_xfy('clause_phrase_word_cut_xfy.txt', 'clause_phrase_word_cut_xfy_weighted.txt', weighted_avg_limit)
+    export_syntactic_measures(a_treebank, weighted_avg_limit, ['clause_phrase_word_cut'])
 #____________________________________________________________________________theend____________________________________________________________________________#
 
 
 #____________________________________________________________________________PHRASE____________________________________________________________________________#
+def s_phrase_word_character_rows(data, state):
+    """x==sentential phrase length in the number of words, y==word length in the number of characters"""
+
+    rows = []
+
+    for word in data.root_list:  # if a root does not have any children, no record is created
+        for child in word.direct_children:
+            phrase_words = child.form + '+' + create_string(child.all_children)
+            word_n = child.subtree_size + 1  # including phrasal head
+            character_n = count_characters(child) + len(child.form)
+            rows.append([data.sentence.id, phrase_words, word_n, character_n])
+
+    return rows
+
+
 def s_phrase_word_character(a_treebank, weighted_avg_limit):
     """quantifies a UD treebank on the phrase level, creates files with data quantification, xfy for original and weighted values,
        x==sentential phrase length in the number of words, f(x)==its frequency, y==word length in the number of characters"""
 
-    word_n = 0  # number of all children of a root
-    character_n = 0  # sum of characters of all root's children
+    export_syntactic_measures(a_treebank, weighted_avg_limit, ['s_phrase_word_character'])
+
+
+def c_phrase_word_character_cut_rows(data, state, chinese_characters_only=False):
+    """x==clausal phrase length in the number of words, y==word length in the number of characters (==CUTS),
+       chinese_characters_only=True -> excluding phrases with non-Chinese graphemes"""
 
-    with open('s_phrase_word_character.txt', mode='w', encoding='utf-8') as output:
-        print('sent_id' + '\t' 'phrase_text' + '\t' + 'word_n' + '\t' + 'character_n', file=output)  # header
+    rows = []
 
-        for sentence in a_treebank.sentence_list:
-            for word in sentence.word_list:
-                if word.deprel == 'root':  # if a root does not have any children, no record is created
-                    for child in word.direct_children:
-                        phrase_words = child.form + '+' + create_string(child.all_children)
-                        word_n = len(child.all_children) + 1  # including phrasal head
-                        character_n = count_characters(child) + len(child.form)
-                        print(sentence.id + '\t' + phrase_words + '\t' + str(word_n) + '\t' + str(character_n), file=output)
+    for word in data.clause_heads:
+        for phrase_words in data.clause_phrases(word):  # including phrasal head (==the last node)
+            if chinese_characters_only and contain_ascii(phrase_words):
+                continue
+            c_phrase_text = FormSequence(phrase_words)
+            word_n = len(phrase_words)
+            character_n = 0
+            for phrase_word in phrase_words:
+                character_n += len(phrase_word.form)
+            rows.append([data.sentence.id, c_phrase_text, word_n, character_n])
 
-    xfy.calculate_xfy('s_phrase_word_character.txt', 's_phrase_word_character_xfy.txt', 'word_n', 'character_n')
-    xfy.calculate_weighted_xfy('s_phrase_word_character_xfy.txt', 's_phrase_word_character_xfy_weighted.txt', weighted_avg_limit)
+    return rows
 
 
 def c_phrase_word_character_cut(a_treebank, weighted_avg_limit):
@@ -295,239 +322,258 @@ def c_phrase_word_character_cut(a_treebank, weighted_avg_limit):
        x==clausal phrase length in the number of words, f(x)==its frequency, y==word length in the number of characters,
        restriction -> clause != phrase applied (==CUTS)"""
 
-    word_n = 0  # number of all children of a non-clausal child of a word commented as 'clause' including the child (=phrasal head)
-    character_n = 0  # sum of characters of all the children including the child (=phrasal head)
-
-    # tokens
-    with open('c_phrase_word_character_cut.txt', mode='w', encoding='utf-8') as output:
-        print('sent_id' + '\t' + 'phrase_text' + '\t' + 'word_n' + '\t' + 'character_n', file=output)  # header
-
-        for sentence in a_treebank.sentence_list:
-            for word in sentence.word_list:
-                if word.comment == 'clause':
-                    for child in word.direct_children:
-                        if child.comment != 'clause':
-                            phrase_words = list_non_clausal_children(child.direct_children)
-                            phrase_words.append(child)
-                            c_phrase_text = create_string(phrase_words)
-                            # for excluding phrases with non-Chinese graphemes -> if not contain_ascii(phrase_words):
-                            word_n = len(phrase_words)  # including phrasal head
-                            character_n = count_non_clausal_children_length(child.direct_children) + len(child.form)  # including phrasal head
-                            print(sentence.id + '\t' + c_phrase_text + '\t' + str(word_n) + '\t' + str(character_n), file=output)
-
-    xfy.calculate_xfy('c_phrase_word_character_cut.txt', 'c_phrase_word_character_cut_xfy.txt', 'word_n', 'character_n')
-    xfy.calculate_weighted_xfy('c_phrase_word_character_cut_xfy.txt', 'c_phrase_word_character_cut_xfy_weighted.txt', weighted_avg_limit)
-
-    # types
-    process_types('c_phrase_word_character_cut.txt', 'c_phrase_word_character_cut_type.txt', 'phrase_text')
-    xfy.calculate_xfy('c_phrase_word_character_cut_type.txt', 'c_phrase_word_character_cut_type_xfy.txt', 'word_n', 'character_n')
-    xfy.calculate_weighted_xfy('c_phrase_word_character_cut_type_xfy.txt', 'c_phrase_word_character_cut_type_xfy_weighted.txt', weighted_avg_limit)
+    export_syntactic_measures(a_treebank, weighted_avg_limit, ['c_phrase_word_character_cut'])
 #____________________________________________________________________________theend____________________________________________________________________________#
 
 
 #______________________________________________________________________________LDS_____________________________________________________________________________#
-def process_lds(a_clausal_head):
-    """identifies a segment which words are linearly and syntactically connected"""
+def segment_lds(a_sentence, clause_owner_list):
+    """identifies segments which words are linearly and syntactically connected for all clauses of a sentence at once,
+       clause_owner_list == clausal head of each node (see SentenceData), returns a dictionary clausal head ID -> its lds,
+       linear time: one backward pass for the next non-punctuation node of each node, one forward pass for segments"""
+
+    next_id_list = [None] * len(a_sentence.word_list)  # ID of the next node which is not a punctuation mark
+    next_id = None
+
+    for word in reversed(a_sentence.word_list):
+        next_id_list[word.id - 1] = next_id
+        if word.deprel != 'punct':
+            next_id = word.id
+
+    clausal_lds = {}
+    current_lds = {}  # clausal head ID -> the last (==still open) segment
+
+    for word in a_sentence.word_list:  # clausal nodes in the ascending order of IDs, no sorting needed
+        clausal_head = clause_owner_list[word.id - 1]
+        if clausal_head is None:
+            continue
+        if clausal_head.id not in current_lds:
+            current_lds[clausal_head.id] = [word]
+            clausal_lds[clausal_head.id] = [current_lds[clausal_head.id]]
+            continue
+        previous_node = current_lds[clausal_head.id][-1]
+        # if a next node == linear neighbour (punctuation skipped) and child or parent
+        if next_id_list[previous_node.id - 1] == word.id and (previous_node.id == word.parentID or previous_node.parentID == word.id):
+            current_lds[clausal_head.id].append(word)
+        # none of the conditions applies -> close a segment
+        else:
+            current_lds[clausal_head.id] = [word]
+            clausal_lds[clausal_head.id].append(current_lds[clausal_head.id])
 
-    clausal_lds = []
-    current_lds = []
-    clausal_nodes = list_non_clausal_children(a_clausal_head.direct_children)
+    return clausal_lds
 
-    # if a clausal head is the only clausal node
-    if len(clausal_nodes) == 0:
-        current_lds.append(a_clausal_head)
-        clausal_lds.append(current_lds)
-        return clausal_lds
 
-    # if a clause includes more than one node
-    clausal_nodes.append(a_clausal_head)  # a list of all clausal nodes including the clausal head
-    clausal_nodes.sort(key=lambda word_node: word_node.id)  # sorts the list according to ID of nodes in the ascending order
+def process_lds(a_clausal_head):
+    """identifies a segment which words are linearly and syntactically connected"""
 
-    for i in range(len(clausal_nodes) - 1):
+    return SentenceData(a_clausal_head.sentence).clause_lds(a_clausal_head)
 
-        current_node = clausal_nodes[i]
 
-        while current_node.next_node.deprel == 'punct':
-            current_node = current_node.next_node
+def sentence_clause_lds_cut_rows(data, state):
+    """x==sentence length in the number of clauses, y==clause length in the number of lds"""
 
-        # if a next node == linear neighbour and child
-        if current_node.next_node == clausal_nodes[i + 1] and clausal_nodes[i].id == clausal_nodes[i + 1].parentID:
-            current_lds.append(clausal_nodes[i])
-        # if a next node == linear neighbour and parent
-        elif current_node.next_node == clausal_nodes[i + 1] and clausal_nodes[i].parentID == clausal_nodes[i + 1].id:
-            current_lds.append(clausal_nodes[i])
-        # none of the conditions applies -> close a segment
-        else:
-            current_lds.append(clausal_nodes[i])
-            clausal_lds.append(current_lds)
-            current_lds = []
+    clause_n = 0  # number of words commented as 'clause'
+    lds_n = 0  # number of lds
 
-    # processes the last node of the clause (==renegade)
-    current_lds.append(clausal_nodes[-1])
-    clausal_lds.append(current_lds)
+    for word in data.clause_heads:
+        clause_n += 1
+        lds_n += len(data.clause_lds(word))
 
-    return clausal_lds
+    return [[data.sentence.id, data.sentence.text, clause_n, lds_n]]
 
 
 def sentence_clause_lds_cut(a_treebank, weighted_avg_limit):
     """quantifies a UD treebank on the sentence level, creates files with data quantification, xfy for original and weighted values,
        x==sentence length in the number of clauses, f(x)==its frequency, y==clause length in the number of lds"""
 
-    clause_n = 0  # number of words commented as 'clause'
-    lds_n = 0  # number of lds
+    export_syntactic_measures(a_treebank, weighted_avg_limit, ['sentence_clause_lds_cut'])
+
 
-    with open('sentence_clause_lds_cut.txt', mode='w', encoding='utf-8') as output:
-        print('sent_id' + '\t' + 'sent_text' + '\t' + 'clause_n' + '\t' + 'lds_n', file=output)  # header
+def clause_lds_word_cut_rows(data, state):
+    """x==clause length in the number of lds, y==lds length in the number of words"""
 
-        for sentence in a_treebank.sentence_list:
-            for word in sentence.word_list:
-                if word.comment == 'clause':
-                    clause_n += 1
-                    lds_n += len(process_lds(word))
-            print(sentence.id + '\t' + sentence.text + '\t' + str(clause_n) + '\t' + str(lds_n), file=output)
-            clause_n = 0
-            lds_n = 0
+    rows = []
 
-    xfy.calculate_xfy('sentence_clause_lds_cut.txt', 'sentence_clause_lds_cut_xfy.txt', 'clause_n', 'lds_n')
-    xfy.calculate_weighted_xfy('sentence_clause_lds_cut_xfy.txt', 'sentence_clause_lds_cut_xfy_weighted.txt', weighted_avg_limit)
+    for word in data.clause_heads:
+        clause_nodes = data.clause_nodes(word)
+        clause_words = word.form + '+' + create_string(clause_nodes)  # including clausal head
+        lds_n = len(data.clause_lds(word))  # number of lds excluding other clauses
+        word_n = len(clause_nodes) + 1  # including clausal head
+        rows.append([data.sentence.id, clause_words, lds_n, word_n])
+
+    return rows
 
 
 def clause_lds_word_cut(a_treebank, weighted_avg_limit):
     """quantifies a UD treebank on the clause level, creates files with data quantification, xfy for original and weighted values,
        x==clause length in the number of lds, f(x)==its frequency, y==lds length in the number of words"""
 
-    lds_n = 0  # number of lds excluding other clauses
-    word_n = 0  # number of all children of clause excluding other clauses
-
-    with open('clause_lds_word_cut.txt', mode='w', encoding='utf-8') as output:
-        print('sent_id' + '\t' + 'clause_text' + '\t' + 'lds_n' + '\t' + 'word_n', file=output)  # header
-
-        for sentence in a_treebank.sentence_list:
-            for word in sentence.word_list:
-                if word.comment == 'clause':
-                    clause_words = word.form + '+' + stringify_non_clausal_children(word.direct_children)  # including clausal head
-                    lds_n = len(process_lds(word))
-                    word_n = count_non_clausal_children(word.direct_children) + 1  # including clausal head
-                    print(sentence.id + '\t' + clause_words + '\t' + str(lds_n) + '\t' + str(word_n), file=output)
-                    lds_n = 0
-                    word_n = 0
-
-    xfy.calculate_xfy('clause_lds_word_cut.txt', 'clause_lds_word_cut_xfy.txt', 'lds_n', 'word_n')
-    xfy.calculate_weighted_xfy('clause_lds_word_cut_xfy.txt', 'clause_lds_word_cut_xfy_weighted.txt', weighted_avg_limit)
-
+    export_syntactic_measures(a_treebank, weighted_avg_limit, ['clause_lds_word_cut'])
+
+
+def clause_lds_word_sud_rows(data):
+    """x==clause length in the number of lds, y==lds length in the number of words, only the main clause (==root)"""
+
+    rows = []
+
+    for word in data.root_list:
+        clause_nodes = data.clause_nodes(word)
+        clause_words = word.form + '+' + create_string(clause_nodes)  # including clausal head
+        lds_n = len(data.clause_lds(word))  # number of lds excluding other clauses
+        word_n = len(clause_nodes) + 1  # including clausal head
+        rows.append([data.sentence.id, clause_words, lds_n, word_n])
+
+    return rows
+
+
+def clause_lds_word_sud(ud_treebank_file, sud_treebank_file, weighted_avg_limit):
+    """quantifies UD and SUD versions of a treebank on the clause level, creates files with data quantification,
+       xfy for original and weighted values, x==clause length in the number of lds, f(x)==its frequency,
+       y==lds length in the number of words, processes one-clause sentences (identified in UD) in UD and SUD samples,
+       both files are streamed in lockstep and sentences are aligned by sent_id, sentences found only in one of the files
+       or in a different order are reported in clause_lds_word_cut_ud_sud_report.txt"""
+
+    ud_sentence_dict = {}  # sent_id of a UD sentence not matched yet -> [True if it is a one-clause sentence, its position]
+    sud_sentence_dict = {}  # sent_id of a SUD sentence not matched yet -> [its rows, its position]
+    matched_list = []  # [UD position, SUD position, sent_id] of matched sentences
+    ud_xfy = xfy.XfyAccumulator()  # lds_n, word_n
+    sud_xfy = xfy.XfyAccumulator()
+    report = []
+
+    header = ['sent_id', 'clause_text', 'lds_n', 'word_n']
+
+    with MAL_output.TableWriter('clause_lds_word_cut_ud.txt', header) as ud_output, \
+            MAL_output.TableWriter('clause_lds_word_cut_sud.txt', header) as sud_output:
+
+        sentence_pairs = zip_longest(MAL_UD_parser.iterate_sentences(ud_treebank_file), MAL_UD_parser.iterate_sentences(sud_treebank_file))
+
+        for position, (ud_sentence, sud_sentence) in enumerate(sentence_pairs):
+            if ud_sentence is not None:
+                one_clause = identify_1CS(ud_sentence.word_list)
+                if one_clause:
+                    for row in clause_lds_word_sud_rows(SentenceData(ud_sentence)):
+                        ud_output.add(row)
+                        ud_xfy.add(row[2], row[3])
+                if ud_sentence.id in sud_sentence_dict:  # the SUD sentence has already been read
+                    sud_rows, sud_position = sud_sentence_dict.pop(ud_sentence.id)
+                    matched_list.append([position, sud_position, ud_sentence.id])
+                    if one_clause:
+                        for row in sud_rows:
+                            sud_output.add(row)
+                            sud_xfy.add(row[2], row[3])
+                else:
+                    ud_sentence_dict[ud_sentence.id] = [one_clause, position]
+
+            if sud_sentence is not None:
+                if sud_sentence.id in ud_sentence_dict:
+                    one_clause, ud_position = ud_sentence_dict.pop(sud_sentence.id)
+                    matched_list.append([ud_position, position, sud_sentence.id])
+                    if one_clause:
+                        for row in clause_lds_word_sud_rows(SentenceData(sud_sentence)):
+                            sud_output.add(row)
+                            sud_xfy.add(row[2], row[3])
+                else:  # the UD sentence has not been read yet (or it does not exist)
+                    sud_sentence_dict[sud_sentence.id] = [clause_lds_word_sud_rows(SentenceData(sud_sentence)), position]
+
+    # a matched sentence preceded (in UD) by a sentence which follows it in SUD
+    last_sud_position = -1
+    for ud_position, sud_position, sent_id in sorted(matched_list):
+        if sud_position < last_sud_position:
+            report.append([sent_id, 'misaligned'])
+        last_sud_position = max(last_sud_position, sud_position)
+
+    for sent_id in ud_sentence_dict:
+        report.append([sent_id, 'ud_only'])
+    for sent_id in sud_sentence_dict:
+        report.append([sent_id, 'sud_only'])
+
+    with open('clause_lds_word_cut_ud_sud_report.txt', mode='w', encoding='utf-8') as output:
+        print('sent_id' + '\t' + 'status', file=output)  # header
+        for row in report:
+            print('\t'.join(row), file=output)
+
+    ud_xfy.save_xfy('clause_lds_word_cut_ud_xfy.txt')
+    ud_xfy.save_weighted_xfy(['clause_lds_word_cut_ud_xfy_weighted.txt'], [weighted_avg_limit])
+    sud_xfy.save_xfy('clause_lds_word_cut_sud_xfy.txt')
+    sud_xfy.save_weighted_xfy(['clause_lds_word_cut_sud_xfy_weighted.txt'], [weighted_avg_limit])
+
+
+def lds_word_character_cut_rows(data, state, chinese_characters_only=False):
+    """x==lds length in the number of words, y==word length in the number of characters,
+       chinese_characters_only=True -> excluding lds with non-Chinese graphemes"""
+
+    rows = []
+
+    for word in data.clause_heads:
+        for lds in data.clause_lds(word):
+            if chinese_characters_only and contain_ascii(lds):
+                continue
+            word_n = len(lds)  # number of words
+            character_n = 0  # sum of characters of all words in lds
+            for lds_word in lds:
+                character_n += len(lds_word.form)
+            rows.append([data.sentence.id, FormSequence(lds), word_n, character_n])
+
+    return rows
 
-# def clause_lds_word_sud(a_treebank, weighted_avg_limit):
-#     """quantifies a UD treebank on the clause level, creates files with data quantification, xfy for original and weighted values,
-#        x==clause length in the number of lds, f(x)==its frequency, y==lds length in the number of words,
-#        processes  one-clause sentences in UD and SUD samples"""
 
-#     lds_n = 0  # number of lds excluding other clauses
-#     word_n = 0  # number of all children of clause excluding other clauses
+def lds_word_character_cut(a_treebank, weighted_avg_limit):
+    """quantifies a UD treebank on the phrase level while taking tokens and types into account,
+       creates files with data quantification, xfy for original and weighted values,
+       x==lds length in the number of words, f(x)==its frequency, y==word length in the number of characters"""
 
-#     one_clause_sentences = []
+    export_syntactic_measures(a_treebank, weighted_avg_limit, ['lds_word_character_cut'])
+#____________________________________________________________________________theend____________________________________________________________________________#
 
-#     with open('clause_lds_word_cut_ud.txt', mode='w', encoding='utf-8') as ud_output:
-#         print('sent_id' + '\t' + 'clause_text' + '\t' + 'lds_n' + '\t' + 'word_n', file=ud_output)  # header
 
-#         for sentence in a_treebank.sentence_list:
-#             if identify_1CS(sentence.word_list):
-#                 one_clause_sentences.append(sentence.id)
-#                 for word in sentence.word_list:
-#                     if word.deprel == 'root':
-#                         clause_words = word.form + '+' + stringify_non_clausal_children(word.direct_children)  # including clausal head
-#                         lds_n = len(process_lds(word))
-#                         word_n = count_non_clausal_children(word.direct_children) + 1 # including clausal head
-#                         print(sentence.id + '\t' + clause_words + '\t' + str(lds_n) + '\t' + str(word_n), file=ud_output)
-#                         lds_n = 0
-#                         word_n = 0
+#__________________________________________________________________________PUNCTUATION_________________________________________________________________________#
+CLAUSAL_PUNCTUATION = ['，', '：', '；', '…', '……']
 
-#     xfy.calculate_xfy('clause_lds_word_cut_ud.txt', 'clause_lds_word_cut_ud_xfy.txt', 'lds_n', 'word_n')
-#     xfy.calculate_weighted_xfy('clause_lds_word_cut_ud_xfy.txt', 'clause_lds_word_cut_ud_xfy_weighted.txt', weighted_avg_limit)
 
-#     # name or directory of a treebank file has to be changed accordingly
-#     sud_treebank = MAL_UD_parser.create_treebank('zh_gsdsimp-sud-train.conllu')
+def sentence_clause_word_punct_rows(data, state):
+    """x==sentence length in the number of clauses, y==clause length in the number of words (clauses based on punctuation)"""
 
-#     with open('clause_lds_word_cut_sud.txt', mode='w', encoding='utf-8') as sud_output:
-#         print('sent_id' + '\t' + 'clause_text' + '\t' + 'lds_n' + '\t' + 'word_n', file=sud_output)  # header
+    clause_n = 1  # including the main clause
 
-#         for sentence in sud_treebank.sentence_list:
-#             if sentence.id in one_clause_sentences:
-#                 for word in sentence.word_list:
-#                     if word.deprel == 'root':
-#                         clause_words = word.form + '+' + stringify_non_clausal_children(word.direct_children)  # including clausal head
-#                         lds_n = len(process_lds(word))
-#                         word_n = count_non_clausal_children(word.direct_children) + 1 # including clausal head
-#                         print(sentence.id + '\t' + clause_words + '\t' + str(lds_n) + '\t' + str(word_n), file=sud_output)
-#                         lds_n = 0
-#                         word_n = 0
+    for word in data.sentence.word_list:
+        if word.deprel == 'punct' and word.form in CLAUSAL_PUNCTUATION:
+            clause_n += 1
 
-#     xfy.calculate_xfy('clause_lds_word_cut_sud.txt', 'clause_lds_word_cut_sud_xfy.txt', 'lds_n', 'word_n')
-#     xfy.calculate_weighted_xfy('clause_lds_word_cut_sud_xfy.txt', 'clause_lds_word_cut_sud_xfy_weighted.txt', weighted_avg_limit)
+    for word in data.root_list:
+        state['word_n'] = word.subtree_size + 1  # number of all root's children including itself
 
+    return [[data.sentence.id, data.sentence.text, clause_n, state.get('word_n', 0)]]
 
-def lds_word_character_cut(a_treebank, weighted_avg_limit):
-    """quantifies a UD treebank on the phrase level while taking tokens and types into account,
-       creates files with data quantification, xfy for original and weighted values,
-       x==lds length in the number of words, f(x)==its frequency, y==word length in the number of characters"""
-
-    word_n = 0  # number of words
-    character_n = 0  # sum of characters of all words in lds
-
-    # tokens
-    with open('lds_word_character_cut.txt', mode='w', encoding='utf-8') as output:
-        print('sent_id' + '\t' + 'lds_text' + '\t' + 'word_n' + '\t' + 'character_n', file=output)  # header
-
-        for sentence in a_treebank.sentence_list:
-            for word in sentence.word_list:
-                if word.comment == 'clause':
-                    lds_list = process_lds(word)
-                    for lds in lds_list:
-                        # for excluding phrases with non-Chinese graphemes -> if not contain_ascii(lds):
-                        word_n = len(lds)
-                        lds_text = ''
-                        for lds_word in lds:
-                            character_n += len(lds_word.form)
-                            lds_text = lds_text + lds_word.form + '+'
-                        print(sentence.id + '\t' + lds_text + '\t' + str(word_n) + '\t' + str(character_n), file=output)
-                        word_n = 0
-                        character_n = 0
-
-    xfy.calculate_xfy('lds_word_character_cut.txt', 'lds_word_character_cut_xfy.txt', 'word_n', 'character_n')
-    xfy.calculate_weighted_xfy('lds_word_character_cut_xfy.txt', 'lds_word_character_cut_xfy_weighted.txt', weighted_avg_limit)
-
-    # types
-    process_types('lds_word_character_cut.txt', 'lds_word_character_cut_type.txt', 'lds_text')
-    xfy.calculate_xfy('lds_word_character_cut_type.txt', 'lds_word_character_cut_type_xfy.txt', 'word_n', 'character_n')
-    xfy.calculate_weighted_xfy('lds_word_character_cut_type_xfy.txt', 'lds_word_character_cut_type_xfy_weighted.txt', weighted_avg_limit)
-#____________________________________________________________________________theend____________________________________________________________________________#
 
-
-#__________________________________________________________________________PUNCTUATION_________________________________________________________________________#
 def sentence_clause_word_punct(a_treebank, weighted_avg_limit):
     """quantifies a UD treebank on the sentence level, creates files with data quantification, xfy for original and weighted values,
        x==sentence length in the number of clauses, f(x)==its frequency, y==clause length in the number of words,
        the clause is determined based on punctuation marks"""
 
-    clause_n = 0  # number of particular punctuation marks
-    word_n = 0  # number of all root's children including itself
+    export_syntactic_measures(a_treebank, weighted_avg_limit, ['sentence_clause_word_punct'])
 
-    clausal_punctuation = ['，', '：', '；', '…', '……']
 
-    with open('sentence_clause_word_punct.txt', mode='w', encoding='utf-8') as output:
-        print('sent_id' + '\t' + 'sent_text' + '\t' + 'clause_n' + '\t' + 'word_n', file=output)  # header
+def clause_word_character_punct_rows(data, state):
+    """x==clause length in the number of words, y==word length in the number of characters (clauses based on punctuation),
+       words following the last punctuation mark of a sentence are carried over to the next sentence in state"""
 
-        for sentence in a_treebank.sentence_list:
-            clause_n += 1  # including the main clause
-            for word in sentence.word_list:
-                if word.deprel == 'punct' and word.form in clausal_punctuation:
-                    clause_n += 1
-                if word.deprel == 'root':
-                    word_n = len(word.all_children) + 1  # including itself
-            print(sentence.id + '\t' + sentence.text + '\t' + str(clause_n) + '\t' + str(word_n), file=output)
-            clause_n = 0
+    rows = []
+    clausal_nodes = state.setdefault('clausal_nodes', [])
 
-    xfy.calculate_xfy('sentence_clause_word_punct.txt', 'sentence_clause_word_punct_xfy.txt', 'clause_n', 'word_n')
-    xfy.calculate_weighted_xfy('sentence_clause_word_punct_xfy.txt', 'sentence_clause_word_punct_xfy_weighted.txt', weighted_avg_limit)
+    for word in data.sentence.word_list:
+        if word.deprel != 'punct':
+            clausal_nodes.append(word)
+        elif (word.form in CLAUSAL_PUNCTUATION and len(clausal_nodes) != 0) or word.next_node is None:  # last node
+            clause = ''
+            word_n = len(clausal_nodes)  # number of words between punctuation marks
+            character_n = 0  # length of words between punctuation marks
+            for node in clausal_nodes:
+                character_n += len(node.form)
+                clause += node.form
+            rows.append([data.sentence.id, clause, word_n, character_n])
+            clausal_nodes = state['clausal_nodes'] = []
+
+    return rows
 
 
 def clause_word_character_punct(a_treebank, weighted_avg_limit):
@@ -535,29 +581,108 @@ def clause_word_character_punct(a_treebank, weighted_avg_limit):
        x==clause length in the number of words, f(x)==its frequency, y==word length in the number of characters,
        the clause is determined based on punctuation marks"""
 
-    word_n = 0  # number of words between punctuation marks
-    character_n = 0  # length of words between punctuation marks
-
-    clausal_punctuation = ['，', '：', '；', '…', '……']
-    clausal_nodes = []
-
-    with open('clause_word_character_punct.txt', mode='w', encoding='utf-8') as output:
-        print('sent_id' + '\t' + 'clause_text' + '\t' + 'word_n' + '\t' + 'character_n', file=output)  # header
-
-        for sentence in a_treebank.sentence_list:
-            for word in sentence.word_list:
-                if word.deprel != 'punct':
-                    clausal_nodes.append(word)
-                elif (word.form in clausal_punctuation and len(clausal_nodes) != 0) or word.next_node is None:  # last node
-                    clause = ''
-                    word_n = len(clausal_nodes)
-                    for node in clausal_nodes:
-                        character_n += len(node.form)
-                        clause += node.form
-                    print(sentence.id + '\t' + clause + '\t' + str(word_n) + '\t' + str(character_n), file=output)
-                    word_n, character_n = 0, 0
-                    clausal_nodes = []
-
-    xfy.calculate_xfy('clause_word_character_punct.txt', 'clause_word_character_punct_xfy.txt', 'word_n', 'character_n')
-    xfy.calculate_weighted_xfy('clause_word_character_punct_xfy.txt', 'clause_word_character_punct_xfy_weighted.txt', weighted_avg_limit)
+    export_syntactic_measures(a_treebank, weighted_avg_limit, ['clause_word_character_punct'])
+#____________________________________________________________________________theend____________________________________________________________________________#
+
+
+#____________________________________________________________________________ENGINE____________________________________________________________________________#
+class SentenceData:
+    """data of a sentence shared by all the measures, derived data are computed at most once per sentence,
+       clause partition: each node is labelled with its clausal head and its phrasal head in one pass in preorder"""
+
+    def __init__(self, sentence):
+        self.sentence = sentence
+        self.root_list = []  # words which deprel is 'root'
+        self.clause_heads = []  # words commented as 'clause'
+        self.clause_owner_list = [None] * len(sentence.word_list)  # clausal head of each node (itself for a clausal head)
+        self.phrase_owner_list = [None] * len(sentence.word_list)  # phrasal head of each node (==non-clausal child of a clausal head)
+        self.node_dict = {}  # clausal head ID -> all its non-clausal children (==CUTS) in preorder
+        self.phrase_node_dict = {}  # clausal head ID -> phrasal head ID -> nodes of the phrase in preorder
+        self.phrase_dict = {}
+        self.lds_dict = None  # clausal head ID -> lds, all clauses are segmented at once
+
+        for word in sentence.word_list:
+            if word.deprel == 'root':
+                self.root_list.append(word)
+            if word.comment == 'clause':
+                self.clause_heads.append(word)
+
+        for word in sentence.preorder_list:  # parents always precede their children
+            if word.comment == 'clause':
+                self.clause_owner_list[word.id - 1] = word
+                self.node_dict[word.id] = []
+                self.phrase_node_dict[word.id] = {}
+            elif word.parent is not None and self.clause_owner_list[word.parent.id - 1] is not None:
+                clausal_head = self.clause_owner_list[word.parent.id - 1]
+                if word.parent is clausal_head:
+                    phrasal_head = word
+                    self.phrase_node_dict[clausal_head.id][word.id] = []
+                else:
+                    phrasal_head = self.phrase_owner_list[word.parent.id - 1]
+                self.clause_owner_list[word.id - 1] = clausal_head
+                self.phrase_owner_list[word.id - 1] = phrasal_head
+                self.node_dict[clausal_head.id].append(word)
+                self.phrase_node_dict[clausal_head.id][phrasal_head.id].append(word)
+
+    def clause_phrases(self, a_clausal_head):
+        """returns node lists of non-clausal phrases of a clausal head (==CUTS), each list ends with its phrasal head"""
+
+        if a_clausal_head.id not in self.phrase_dict:
+            phrase_list = []
+            for phrase_words in self.phrase_node_dict[a_clausal_head.id].values():
+                phrase_list.append(phrase_words[1:] + phrase_words[:1])
+            self.phrase_dict[a_clausal_head.id] = phrase_list
+
+        return self.phrase_dict[a_clausal_head.id]
+
+    def clause_nodes(self, a_clausal_head):
+        """returns all non-clausal children of a clausal head (==CUTS) in the same order as list_non_clausal_children"""
+
+        return self.node_dict[a_clausal_head.id]
+
+    def clause_length(self, a_clausal_head):
+        """counts characters of all non-clausal children of a clausal head (==CUTS)"""
+
+        character_n = 0
+
+        for node in self.clause_nodes(a_clausal_head):
+            character_n += len(node.form)
+
+        return character_n
+
+    def clause_lds(self, a_clausal_head):
+        """returns lds of a clausal head"""
+
+        if self.lds_dict is None:
+            self.lds_dict = segment_lds(self.sentence, self.clause_owner_list)
+
+        return self.lds_dict[a_clausal_head.id]
+
+
+SYNTACTIC_MEASURES = {}
+
+for a_measure in [
+        E.Measure('sentence_clause_word_cut', ['sent_id', 'sent_text', 'clause_n', 'word_n'], sentence_clause_word_cut_rows, 'clause_n', 'word_n', create_data=SentenceData),
+        E.Measure('sentence_clause_word_punct', ['sent_id', 'sent_text', 'clause_n', 'word_n'], sentence_clause_word_punct_rows, 'clause_n', 'word_n', create_data=SentenceData),
+        E.Measure('sentence_phrase_word', ['sent_id', 'sent_text', 'phrase_n', 'word_n'], sentence_phrase_word_rows, 'phrase_n', 'word_n', create_data=SentenceData),
+        E.Measure('sentence_clause_phrase_cut', ['sent_id', 'sent_text', 'clause_n', 'c_phrase_n'], sentence_clause_phrase_cut_rows, 'clause_n', 'c_phrase_n', create_data=SentenceData),
+        E.Measure('sentence_clause_lds_cut', ['sent_id', 'sent_text', 'clause_n', 'lds_n'], sentence_clause_lds_cut_rows, 'clause_n', 'lds_n', create_data=SentenceData),
+        E.Measure('clause_word_character_cut', ['sent_id', 'clause_text', 'word_n', 'character_n'], clause_word_character_cut_rows, 'word_n', 'character_n', create_data=SentenceData),
+        E.Measure('clause_word_character_punct', ['sent_id', 'clause_text', 'word_n', 'character_n'], clause_word_character_punct_rows, 'word_n', 'character_n', create_data=SentenceData),
+        E.Measure('clause_phrase_word_cut', ['sent_id', 'clause_text', 'c_phrase_n', 'word_n'], clause_phrase_word_cut_rows, 'c_phrase_n', 'word_n', create_data=SentenceData),
+        E.Measure('clause_lds_word_cut', ['sent_id', 'clause_text', 'lds_n', 'word_n'], clause_lds_word_cut_rows, 'lds_n', 'word_n', create_data=SentenceData),
+        E.Measure('s_phrase_word_character', ['sent_id', 'phrase_text', 'word_n', 'character_n'], s_phrase_word_character_rows, 'word_n', 'character_n', create_data=SentenceData),
+        E.Measure('c_phrase_word_character_cut', ['sent_id', 'phrase_text', 'word_n', 'character_n'], c_phrase_word_character_cut_rows, 'word_n', 'character_n', 'phrase_text', create_data=SentenceData),
+        E.Measure('lds_word_character_cut', ['sent_id', 'lds_text', 'word_n', 'character_n'], lds_word_character_cut_rows, 'word_n', 'character_n', 'lds_text', create_data=SentenceData)]:
+    SYNTACTIC_MEASURES[a_measure.name] = a_measure
+
+
+def export_syntactic_measures(a_treebank, weighted_avg_limit, measure_names=None):
+    """walks the treebank only once and feeds every given measure (all of them by default) with shared sentence data,
+       creates files with data quantification, xfy for original and weighted values (+ types if applicable)"""
+
+    if measure_names is None:
+        measure_names = list(SYNTACTIC_MEASURES)
+
+    E.export_measures(a_treebank, weighted_avg_limit, [SYNTACTIC_MEASURES[name] for name in measure_names])
 #____________________________________________________________________________theend____________________________________________________________________________#
@@ -0,0 +1,101 @@
+# VARIANT SWEEP: VARIANTS OF THE MEASURES COMPUTED DURING A SINGLE PASS THROUGH A TREEBANK
+# a variant == a set of switches, e.g. {'chise', 'max_decomposition', 'prop_nouns_excl'},
+# its output files are named according to the naming scheme of the data directories, e.g.
+# word_character_component_token_xfy_chise_max_decomposition_prop_nouns_excl.txt
+
+
+from itertools import combinations
+import MAL_engine as E
+import MAL_syntactic_level as S
+import MAL_word_level as W
+import MAL_character_level as C
+
+
+ALL_MEASURES = {}
+ALL_MEASURES.update(S.SYNTACTIC_MEASURES)
+ALL_MEASURES.update(W.WORD_MEASURES)
+ALL_MEASURES.update(C.CHARACTER_MEASURES)
+
+# switches applicable to the measures (== keyword arguments of their row functions)
+SWITCHES = {'sentence_clause_phrase_cut': ['clauses_without_phrases_excl'],  # APPROACH 2
+            'clause_word_character_cut': ['chinese_characters_only'],
+            'clause_phrase_word_cut': ['clausal_heads_incl'],  # APPROACH 2
+            'c_phrase_word_character_cut': ['chinese_characters_only'],
+            'lds_word_character_cut': ['chinese_characters_only'],
+            'word_character_component': ['chise', 'max_decomposition', 'prop_nouns_excl'],
+            'word_character_stroke': ['prop_nouns_excl'],
+            'word_syllable_sound': ['prop_nouns_excl'],
+            'character_component_stroke': ['chise', 'max_decomposition']}
+
+# units named in the suffix of the variants 'chinese_characters_only'
+CHINESE_CHARACTERS_ONLY_UNITS = {'clause_word_character_cut': 'clauses',
+                                 'c_phrase_word_character_cut': 'phrases',
+                                 'lds_word_character_cut': 'lds'}
+
+
+def create_variant_name(measure_name, switch_set):
+    """creates a suffix of output files of a variant, an empty string for the default variant"""
+
+    name_list = []
+
+    # source for decomposition of Chinese characters (BLCU with no maximal decomposition == default)
+    if 'chise' in switch_set and 'max_decomposition' in switch_set:
+        name_list.append('chise_max_decomposition')
+    elif 'chise' in switch_set:
+        name_list.append('chise_decomposition')
+    elif 'max_decomposition' in switch_set:
+        name_list.append('blcu_max_decomposition')
+
+    if 'chinese_characters_only' in switch_set:
+        name_list.append(CHINESE_CHARACTERS_ONLY_UNITS[measure_name] + '_in_chinese_characters_only')
+
+    for switch in ['clauses_without_phrases_excl', 'clausal_heads_incl', 'prop_nouns_excl']:
+        if switch in switch_set:
+            name_list.append(switch)
+
+    return '_'.join(name_list)
+
+
+def create_switch_matrix(switch_list):
+    """returns all combinations of given switches including the empty one (== default variants)"""
+
+    switch_set_list = []
+
+    for n in range(len(switch_list) + 1):
+        for combination in combinations(switch_list, n):
+            switch_set_list.append(set(combination))
+
+    return switch_set_list
+
+
+def create_variant_measures(switch_set_list, measure_names=None):
+    """returns variants of given measures (all of them by default) for every set of switches,
+       a variant is created only if all its switches are applicable to a measure, each variant only once"""
+
+    if measure_names is None:
+        measure_names = list(ALL_MEASURES)
+
+    measure_list = []
+    created_variants = set()
+
+    for measure_name in measure_names:
+        for switch_set in switch_set_list:
+            if not set(switch_set) <= set(SWITCHES.get(measure_name, [])):
+                continue
+            variant = create_variant_name(measure_name, switch_set)
+            if (measure_name, variant) in created_variants:
+                continue
+            created_variants.add((measure_name, variant))
+            options = {}
+            for switch in switch_set:
+                options[switch] = True
+            measure_list.append(ALL_MEASURES[measure_name].create_variant(variant, **options))
+
+    return measure_list
+
+
+def export_variants(a_treebank, weighted_avg_limit, switch_set_list, measure_names=None):
+    """computes all requested variants of given measures (all of them by default) during a single pass through the treebank,
+       creates files with data quantification, xfy for original and weighted values (+ types if applicable)"""
+
+    E.export_measures(a_treebank, weighted_avg_limit, create_variant_measures(switch_set_list, measure_names))
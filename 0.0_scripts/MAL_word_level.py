@@ -4,10 +4,10 @@
 # Triplet of word-syllable-sound
 
 
-import pandas as pd
-import MAL_word_character_processing as CH
+import numpy as np
+import MAL_engine as E
+import MAL_character_table as CT
 import MAL_word_pinyin_processing as PY
-import MAL_xfy as xfy
 
 
 # AUXILIARY FUNCTION
@@ -21,101 +21,100 @@ def contain_ascii(a_word):
     return False
 
 
-def count_graphemes(a_syllable_list):
-    """counts a word length in the number of graphemes"""
+def sum_by_word(values, bounds):
+    """sums values of characters of each word, characters of word i == values[bounds[i]:bounds[i + 1]]"""
 
-    grapheme_n = 0
+    return np.diff(np.concatenate(([0], np.cumsum(values)))[bounds])
 
-    for syllable in a_syllable_list:
-        grapheme_n += len(syllable)
 
-    return grapheme_n
+def count_component_stroke(word_list, character_table, chise=False, max_decomposition=False):
+    """counts lengths of given words in the number of components and strokes (0, 0 when data is not available),
+       characters of all the words are looked up at once,
+       chise=True -> CHISE instead of BLCU as a source for components (strokes are not counted)"""
 
+    codes = character_table.codes(''.join([word.form for word in word_list]))
+    bounds = np.cumsum([0] + [len(word.form) for word in word_list])
 
-def count_all_components(character, metadata_dict):
-    """recursively counts all components in a character, i.e. until each component cannot be decomposed further,
-       ==maximal decomposition"""
+    component_values = character_table.component_array(chise, max_decomposition)[codes].astype(np.int64)
+    missing = component_values == -1
 
-    component_n = 0
+    if chise:
+        stroke_values = np.zeros(len(codes), dtype=np.int64)
+    else:
+        stroke_values = character_table.stroke_n[codes].astype(np.int64)
 
-    for component in metadata_dict[character]['component']:
-        if component in metadata_dict and metadata_dict[component]['component_n'] > 1:
-            component_n += count_all_components(component, metadata_dict)
-        else:
-            component_n += 1
+    component_values[missing] = 0
+    stroke_values[missing] = 0
 
-    return component_n
+    # to detect when data is not available
+    available = sum_by_word(missing, bounds) == 0
+    component_sums = np.where(available, sum_by_word(component_values, bounds), 0)
+    stroke_sums = np.where(available, sum_by_word(stroke_values, bounds), 0)
 
+    return [(int(component_n), int(stroke_n)) for component_n, stroke_n in zip(component_sums, stroke_sums)]
 
-def count_component_stroke(word, metadata_dict):
-    """counts a word length in the number of components and strokes"""
 
-    component_n = 0
-    stroke_n = 0
+def check_syllables(word):
 
-    for character in word.form:
-        if character in metadata_dict:
-            # component_n += count_all_components(character, metadata_dict)  # maximal decomposition
-            component_n += metadata_dict[character]['component_n']
-            stroke_n += metadata_dict[character]['stroke_n']
-        else:  # to detect when data is not available
-            return 0, 0
+    for grapheme in word.transliteration:
+        if not grapheme.isascii():
+            return False
 
-    return component_n, stroke_n
+    return True
 
 
-def process_types(input_file, output_file, column_name):
-    """loads quantified data of word tokens, drops duplicates, saves quantified data for word types"""
+def is_processed(word, prop_nouns_excl=False):
+    """decides whether a word is quantified, i.e. it is not a punctuation mark and it does not contain ascii letters,
+       prop_nouns_excl=True -> excluding proper nouns"""
 
-    token_df = pd.read_csv(input_file, delimiter='\t')
-    type_df = token_df.drop_duplicates(subset=[column_name])
-    type_df.to_csv(path_or_buf=output_file, sep='\t', index=False)
+    # LCMC:
+    # proper nouns -> word.upos in ['nr', 'ns', 'nt', 'nz'] instead of word.upos == 'PROPN'
+    # punctuation -> word.upos in ['w', 'ew'] instead of word.deprel == 'punct'
+    if prop_nouns_excl and word.upos == 'PROPN':  # UD treebanks
+        return False
 
+    return not contain_ascii(word) and word.deprel != 'punct'
 
-def check_syllables(word):
 
-    for grapheme in word.transliteration:
-        if not grapheme.isascii():
-            return False
+# CORE FUNCTIONS ACCORDING TO LEVELS
+# each measure consists of a function creating its rows for a given sentence and a function processing a whole treebank,
+# keyword arguments of the row functions switch between variants of the measures (see MAL_variants)
+def word_character_component_rows(sentence, state, prop_nouns_excl=False, chise=False, max_decomposition=False):
+    """x==word length in the number of characters, y==character length in the number of components,
+       chise=True -> CHISE instead of BLCU as a source for decomposition of Chinese characters"""
 
-    return True
+    word_list = [word for word in sentence.word_list if is_processed(word, prop_nouns_excl)]
+    # choose a source for decomposition of Chinese characters
+    counts = count_component_stroke(word_list, CT.get_character_table(), chise, max_decomposition)
+    rows = []
+
+    for word, (component_n, stroke_n) in zip(word_list, counts):
+        character_n = len(word.form)
+        rows.append([sentence.id, word.form, character_n, component_n])
+
+    return rows
 
 
-# CORE FUNCTIONS ACCORDING TO LEVELS
 def word_character_component(a_treebank, weighted_avg_limit):
     """quantifies a UD treebank on the word level while taking tokens and types into account,
        creates files with data quantification, xfy for original and weighted values,
        x==word length in the number of characters, f(x)==its frequency, y==character length in the number of components"""
 
-    # choose a source for decomposition of Chinese characters
-    character_metadata = CH.create_blcu_dict('hzinfo.txt')
-    # character_metadata = CH.create_chise_dictionary('IDS-UCS-Basic.txt')
-
-    # tokens
-    with open('word_character_component_token.txt', mode='w', encoding='utf-8') as output:
-        print('sent_id' + '\t' + 'word_char' + '\t' + 'character_token_n' + '\t' + 'component_n', file=output)  # header
-
-        for sentence in a_treebank.sentence_list:
-            for word in sentence.word_list:
-                # UD treebanks:
-                # for excluding proper nouns -> and word.upos != 'PROPN':
-                if not contain_ascii(word) and word.deprel != 'punct':
-                # LCMC:
-                # for excluding proper nouns -> and word.upos not in proper_noun_upos:
-                # punctuation_upos = ['w', 'ew']
-                # proper_noun_upos = ['nr', 'ns', 'nt', 'nz']
-                # if not contain_ascii(word) and word.upos not in punctuation_upos:
-                    character_n = len(word.form)
-                    component_n, stroke_n = count_component_stroke(word, character_metadata)
-                    print(sentence.id + '\t' + word.form + '\t' + str(character_n) + '\t' + str(component_n), file=output)
-
-    xfy.calculate_xfy('word_character_component_token.txt', 'word_character_component_token_xfy.txt', 'character_token_n', 'component_n')
-    xfy.calculate_weighted_xfy('word_character_component_token_xfy.txt', 'word_character_component_token_xfy_weighted.txt', weighted_avg_limit)
-
-    # types
-    process_types('word_character_component_token.txt', 'word_character_component_type.txt', 'word_char')
-    xfy.calculate_xfy('word_character_component_type.txt', 'word_character_component_type_xfy.txt', 'character_token_n', 'component_n')
-    xfy.calculate_weighted_xfy('word_character_component_type_xfy.txt', 'word_character_component_type_xfy_weighted.txt', weighted_avg_limit)
+    E.export_measures(a_treebank, weighted_avg_limit, [WORD_MEASURES['word_character_component']])
+
+
+def word_character_stroke_rows(sentence, state, prop_nouns_excl=False):
+    """x==word length in the number of characters, y==character length in the number of strokes"""
+
+    word_list = [word for word in sentence.word_list if is_processed(word, prop_nouns_excl)]
+    counts = count_component_stroke(word_list, CT.get_character_table())
+    rows = []
+
+    for word, (component_n, stroke_n) in zip(word_list, counts):
+        character_n = len(word.form)
+        rows.append([sentence.id, word.form, word.upos, character_n, stroke_n])
+
+    return rows
 
 
 def word_character_stroke(a_treebank, weighted_avg_limit):
@@ -123,33 +122,27 @@ def word_character_stroke(a_treebank, weighted_avg_limit):
        creates files with data quantification, xfy for original and weighted values,
        x==word length in the number of characters, f(x)==its frequency, y==character length in the number of strokes"""
 
-    character_metadata = CH.create_blcu_dict('hzinfo.txt')
+    E.export_measures(a_treebank, weighted_avg_limit, [WORD_MEASURES['word_character_stroke']])
+
 
-    # tokens
-    with open('word_character_stroke_token.txt', mode='w', encoding='utf-8') as output:
-        print('sent_id' + '\t' + 'word_char' + '\t' + 'upos' + '\t' + 'character_token_n' + '\t' + 'stroke_n', file=output)  # header
+def word_syllable_sound_rows(sentence, state, prop_nouns_excl=False):
+    """x==word length in the number of syllables, y==syllable length in the number of sounds"""
 
-        for sentence in a_treebank.sentence_list:
-            for word in sentence.word_list:
-                # UD treebanks:
-                # for excluding proper nouns -> and word.upos != 'PROPN':
-                if not contain_ascii(word) and word.deprel != 'punct':
-                # LCMC:
-                # for excluding proper nouns -> and word.upos not in proper_noun_upos:
-                # punctuation_upos = ['w', 'ew']
-                # proper_noun_upos = ['nr', 'ns', 'nt', 'nz']
-                # if not contain_ascii(word) and word.upos not in punctuation_upos:
-                    character_n = len(word.form)
-                    component_n, stroke_n = count_component_stroke(word, character_metadata)
-                    print(sentence.id + '\t' + word.form + '\t' + word.upos + '\t' + str(character_n) + '\t' + str(stroke_n), file=output)
+    rows = []
 
-    xfy.calculate_xfy('word_character_stroke_token.txt', 'word_character_stroke_token_xfy.txt', 'character_token_n', 'stroke_n')
-    xfy.calculate_weighted_xfy('word_character_stroke_token_xfy.txt', 'word_character_stroke_token_xfy_weighted.txt', weighted_avg_limit)
+    for word in sentence.word_list:
+        # LCMC: ... and check_syllables(word)
+        if is_processed(word, prop_nouns_excl) and word.transliteration is not None:
+            character_n = len(word.form)
+            syllable_list = []
+            sound_n = 0
+            for syllable in word.transliteration.split(','):
+                sound, syllable_sound_n = PY.find_sound(syllable)
+                syllable_list.append(sound)
+                sound_n += syllable_sound_n
+            rows.append([sentence.id, syllable_list, word.form, word.upos, character_n, sound_n])
 
-    # types
-    process_types('word_character_stroke_token.txt', 'word_character_stroke_type.txt', 'word_char')
-    xfy.calculate_xfy('word_character_stroke_type.txt', 'word_character_stroke_type_xfy.txt', 'character_token_n', 'stroke_n')
-    xfy.calculate_weighted_xfy('word_character_stroke_type_xfy.txt', 'word_character_stroke_type_xfy_weighted.txt', weighted_avg_limit)
+    return rows
 
 
 def word_syllable_sound(a_treebank, weighted_avg_limit):
@@ -157,31 +150,16 @@ def word_syllable_sound(a_treebank, weighted_avg_limit):
        creates files with data quantification, xfy for original and weighted values,
        x==word length in the number of syllables, f(x)==its frequency, y==syllable length in the number of sounds"""
 
-    # tokens
-    with open('word_syllable_sound_token.txt', mode='w', encoding='utf-8') as output:
-        print('sent_id' + '\t' + 'word_sound' + '\t' + 'word_form' + '\t' + 'upos' + '\t' + 'character_token_n' + '\t' + 'sound_n', file=output)  # header
-
-        for sentence in a_treebank.sentence_list:
-            for word in sentence.word_list:
-                # UD treebanks:
-                # for excluding proper nouns -> and word.upos != 'PROPN':
-                if not contain_ascii(word) and word.deprel != 'punct' and word.transliteration is not None:
-                # LCMC:
-                # for excluding proper nouns -> and word.upos not in proper_noun_upos:
-                # punctuation_upos = ['w', 'ew']
-                # proper_noun_upos = ['nr', 'ns', 'nt', 'nz']
-                # if not contain_ascii(word) and word.upos not in punctuation_upos and word.transliteration is not None and check_syllables(word):
-                    character_n = len(word.form)
-                    syllable_list = []
-                    for syllable in word.transliteration.split(','):
-                        syllable_list.append(PY.transform_into_sound(syllable))
-                    sound_n = count_graphemes(syllable_list)
-                    print(sentence.id + '\t' + str(syllable_list) + '\t' + word.form + '\t' + word.upos + '\t' + str(character_n) + '\t' + str(sound_n), file=output)
-
-    xfy.calculate_xfy('word_syllable_sound_token.txt', 'word_syllable_sound_token_xfy.txt', 'character_token_n', 'sound_n')
-    xfy.calculate_weighted_xfy('word_syllable_sound_token_xfy.txt', 'word_syllable_sound_token_xfy_weighted.txt', weighted_avg_limit)
-
-    # types
-    process_types('word_syllable_sound_token.txt', 'word_syllable_sound_type.txt', 'word_sound')
-    xfy.calculate_xfy('word_syllable_sound_type.txt', 'word_syllable_sound_type_xfy.txt', 'character_token_n', 'sound_n')
-    xfy.calculate_weighted_xfy('word_syllable_sound_type_xfy.txt', 'word_syllable_sound_type_xfy_weighted.txt', weighted_avg_limit)
+    E.export_measures(a_treebank, weighted_avg_limit, [WORD_MEASURES['word_syllable_sound']])
+
+
+WORD_MEASURES = {}
+
+for a_measure in [
+        E.Measure('word_character_component', ['sent_id', 'word_char', 'character_token_n', 'component_n'], word_character_component_rows,
+                  'character_token_n', 'component_n', 'word_char', token_name='word_character_component_token'),
+        E.Measure('word_character_stroke', ['sent_id', 'word_char', 'upos', 'character_token_n', 'stroke_n'], word_character_stroke_rows,
+                  'character_token_n', 'stroke_n', 'word_char', token_name='word_character_stroke_token'),
+        E.Measure('word_syllable_sound', ['sent_id', 'word_sound', 'word_form', 'upos', 'character_token_n', 'sound_n'], word_syllable_sound_rows,
+                  'character_token_n', 'sound_n', 'word_sound', token_name='word_syllable_sound_token')]:
+    WORD_MEASURES[a_measure.name] = a_measure
@@ -98,3 +98,39 @@ def transform_into_sound(a_word):
     a_word = replace_nasal_ng(a_word)
 
     return a_word
+
+
+# TABLE OF SOUNDS OF PINYIN SYLLABLES
+# toneless syllables (== all combinations of the initials and finals below, including the spelling with 'y' and 'w')
+# are transformed only once, unseen input is transformed by the rules above and added to the table
+
+INITIALS = ['', 'b', 'p', 'm', 'f', 'd', 't', 'n', 'l', 'g', 'k', 'h', 'j', 'q', 'x', 'zh', 'ch', 'sh', 'r', 'z', 'c', 's', 'y', 'w']
+
+FINALS = ['a', 'o', 'e', 'ai', 'ei', 'ao', 'ou', 'an', 'en', 'ang', 'eng', 'ong', 'er', 'i', 'ia', 'ie', 'iao', 'iu', 'ian', 'in',
+          'iang', 'ing', 'iong', 'u', 'ua', 'uo', 'uai', 'ui', 'uan', 'un', 'uang', 'ue', 'v', 've', 'ü', 'üe']
+
+
+def create_sound_table():
+    """returns a dictionary: syllable -> [syllable transformed into sounds, number of sounds]"""
+
+    sound_table = {}
+
+    for initial in INITIALS:
+        for final in FINALS:
+            sound = transform_into_sound(initial + final)
+            sound_table[initial + final] = [sound, len(sound)]
+
+    return sound_table
+
+
+SOUND_TABLE = create_sound_table()
+
+
+def find_sound(a_syllable):
+    """returns a syllable transformed into sounds and the number of sounds using the table of sounds"""
+
+    if a_syllable not in SOUND_TABLE:
+        sound = transform_into_sound(a_syllable)
+        SOUND_TABLE[a_syllable] = [sound, len(sound)]
+
+    return SOUND_TABLE[a_syllable]
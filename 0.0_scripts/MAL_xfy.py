@@ -1,13 +1,13 @@
 # FUNCTIONS FOR CALCULATING CONSTRUCT LENGTHS, THEIR FREQUENCIES, CONSTITUENT LENGTHS + WEIGHTED VALUES
 
 
+import numpy as np
 import pandas as pd
 
 
-def calculate_xfy(input_file, output_file, construct_column, constituent_column):
-    """calculates construct lengths, their frequencies and constituent lengths"""
+def create_xfy_df(input_df, construct_column, constituent_column):
+    """calculates construct lengths, their frequencies and constituent lengths from a data frame of quantified data"""
 
-    input_df = pd.read_csv(input_file, delimiter='\t')
     construct_dict = {}
 
     # filters out records where constituent lengths equal zero
@@ -27,10 +27,111 @@ def calculate_xfy(input_file, output_file, construct_column, constituent_column)
         construct_dict[value]['frequency'] = construct_n[value]
         construct_dict[value]['avg_constituent_len'] = constituent_sum[value]/construct_n[value]/value
 
-    xfy_df = pd.DataFrame.from_dict(construct_dict, orient="index").sort_index()
+    return pd.DataFrame.from_dict(construct_dict, orient="index").sort_index()
+
+
+def calculate_xfy(input_file, output_file, construct_column, constituent_column):
+    """calculates construct lengths, their frequencies and constituent lengths"""
+
+    input_df = pd.read_csv(input_file, delimiter='\t')
+    xfy_df = create_xfy_df(input_df, construct_column, constituent_column)
     xfy_df.to_csv(path_or_buf=output_file, sep='\t', index_label=['construct'])
 
 
+class XfyAccumulator:
+    """accumulates (construct length, constituent length) pairs during a pass through a treebank,
+       keeps the number of constructs, the sum and the sum of squares of constituent lengths for each construct length in arrays
+       (index == construct length), accumulators of parts of a treebank can be merged"""
+
+    # number of pairs buffered before they are added to the arrays at once
+    BUFFER_SIZE = 1 << 16
+
+    def __init__(self):
+        self.count = np.zeros(0, dtype=np.int64)
+        self.sum = np.zeros(0, dtype=np.int64)
+        self.sumsq = np.zeros(0, dtype=np.int64)
+        self.construct_buffer = []
+        self.constituent_buffer = []
+
+    def add(self, construct, constituent):
+        """adds a pair, records where constituent lengths equal zero are filtered out"""
+
+        if constituent != 0:
+            self.construct_buffer.append(construct)
+            self.constituent_buffer.append(constituent)
+            if len(self.construct_buffer) >= self.BUFFER_SIZE:
+                self.flush()
+
+    def flush(self):
+        """adds the buffered pairs to the arrays"""
+
+        if not self.construct_buffer:
+            return
+
+        constructs = np.array(self.construct_buffer, dtype=np.int64)
+        constituents = np.array(self.constituent_buffer, dtype=np.int64)
+        size = max(len(self.count), int(constructs.max()) + 1)
+
+        self.count = self.resize(self.count, size) + np.bincount(constructs, minlength=size)
+        self.sum = self.resize(self.sum, size) + np.bincount(constructs, weights=constituents, minlength=size).astype(np.int64)
+        self.sumsq = self.resize(self.sumsq, size) + np.bincount(constructs, weights=constituents ** 2, minlength=size).astype(np.int64)
+
+        self.construct_buffer = []
+        self.constituent_buffer = []
+
+    @staticmethod
+    def resize(an_array, size):
+        """returns an array padded by zeros to a given size"""
+
+        return np.concatenate((an_array, np.zeros(size - len(an_array), dtype=np.int64)))
+
+    def merge(self, other):
+        """adds pairs of another accumulator to this one"""
+
+        self.flush()
+        other.flush()
+        size = max(len(self.count), len(other.count))
+
+        self.count = self.resize(self.count, size) + self.resize(other.count, size)
+        self.sum = self.resize(self.sum, size) + self.resize(other.sum, size)
+        self.sumsq = self.resize(self.sumsq, size) + self.resize(other.sumsq, size)
+
+        return self
+
+    def create_xfy(self):
+        """returns arrays of construct lengths, their frequencies and average constituent lengths,
+       construct lengths equal to zero are filtered out"""
+
+        self.flush()
+        construct = np.flatnonzero(self.count)
+        construct = construct[construct != 0]
+        frequency = self.count[construct]
+        avg_constituent_len = self.sum[construct] / frequency / construct
+
+        return construct, frequency, avg_constituent_len
+
+    def save_weighted_xfy(self, output_file_list, limit_list):
+        """saves weighted xfy for each limit into its file (see pool_xfy)"""
+
+        construct, frequency, avg_constituent_len = self.create_xfy()
+
+        for pooled_xfy, output_file in zip(pool_xfy(construct, frequency, avg_constituent_len, limit_list), output_file_list):
+            save_weighted_xfy(pooled_xfy, output_file)
+
+    def save_xfy(self, output_file):
+        """saves xfy in the same format as calculate_xfy"""
+
+        construct, frequency, avg_constituent_len = self.create_xfy()
+
+        with open(output_file, mode='w', encoding='utf-8') as output:
+            if len(construct) == 0:
+                print('construct', file=output)  # header
+                return
+            print('construct' + '\t' + 'frequency' + '\t' + 'avg_constituent_len', file=output)  # header
+            for x, f, y in zip(construct.tolist(), frequency.tolist(), avg_constituent_len.tolist()):
+                print(str(x) + '\t' + str(f) + '\t' + str(y), file=output)
+
+
 def calculate_values(xfy_list, index_1, index_2):
     """calculates required values .. too tired to write a comment here"""
 
@@ -45,28 +146,100 @@ def calculate_values(xfy_list, index_1, index_2):
     return w_avg_construct, total_frequency, w_avg_constituent
 
 
-def calculate_weighted_xfy(input_file, output_file, constant):
-    """loads xfy data and calculates weighted average (if applicable), bottom-up"""
-
-    xfy_df = pd.read_csv(input_file, delimiter='\t')
-    xfy_list = xfy_df.to_dict('records')
-
-    for index in range(len(xfy_list) - 1, -1, -1):
-        if index > 0 and xfy_list[index]['frequency'] < constant:
-            x, f, y = calculate_values(xfy_list, index, index - 1)
-            xfy_list[index - 1]['construct'] = x
-            xfy_list[index - 1]['frequency'] = f
-            xfy_list[index - 1]['avg_constituent_len'] = y
-            xfy_list.pop(index)
-        elif index == 0 and xfy_list[index]['frequency'] < constant:
-            x, f, y = calculate_values(xfy_list, index, index + 1)
-            xfy_list[index + 1]['construct'] = x
-            xfy_list[index + 1]['frequency'] = f
-            xfy_list[index + 1]['avg_constituent_len'] = y
-            xfy_list.pop(index)
+def pool_xfy(construct, frequency, avg_constituent_len, limit_list):
+    """calculates weighted averages, bottom-up, for several limits at once: a (pooled) row with frequency lower than a limit
+       is merged into the preceding row (the first row into the following one), all the limits are processed
+       in a single pass over the rows, returns a list of pooled xfy (one per limit) in the form
+       of [construct, frequency, avg_constituent_len, pooled] where pooled == True for constructs which are weighted averages"""
+
+    row_n = len(construct)
+    limits = np.asarray(limit_list)
+    limit_n = len(limits)
+
+    x = np.asarray(construct, dtype=np.float64)
+    f = np.asarray(frequency, dtype=np.int64)
+    y = np.asarray(avg_constituent_len, dtype=np.float64)
+
+    # pooled rows are saved from the last one to the first one, pointer == number of saved rows for each limit
+    out_x = np.zeros((limit_n, row_n))
+    out_f = np.zeros((limit_n, row_n), dtype=np.int64)
+    out_y = np.zeros((limit_n, row_n))
+    out_pooled = np.zeros((limit_n, row_n), dtype=bool)
+    pointer = np.zeros(limit_n, dtype=np.int64)
+    limit_index = np.arange(limit_n)
+
+    if row_n == 0:
+        return [[[], [], [], []] for _ in limits]
+
+    # the current (possibly pooled) row for each limit
+    current_x = np.full(limit_n, x[-1])
+    current_f = np.full(limit_n, f[-1])
+    current_y = np.full(limit_n, y[-1])
+    current_pooled = np.zeros(limit_n, dtype=bool)
+
+    for index in range(row_n - 1, 0, -1):
+        merged = current_f < limits
+        saved = ~merged
+        rows = limit_index[saved]
+        out_x[rows, pointer[saved]] = current_x[saved]
+        out_f[rows, pointer[saved]] = current_f[saved]
+        out_y[rows, pointer[saved]] = current_y[saved]
+        out_pooled[rows, pointer[saved]] = current_pooled[saved]
+        pointer[saved] += 1
+
+        total_frequency = current_f + f[index - 1]
+        current_x = np.where(merged, (current_x * current_f + x[index - 1] * f[index - 1]) / total_frequency, x[index - 1])
+        current_y = np.where(merged, (current_y * current_f + y[index - 1] * f[index - 1]) / total_frequency, y[index - 1])
+        current_f = np.where(merged, total_frequency, f[index - 1])
+        current_pooled = merged
+
+    # the first row is merged into the following (already saved) one, if there is any
+    merged = (current_f < limits) & (pointer > 0)
+    rows = limit_index[merged]
+    following = pointer[merged] - 1
+    total_frequency = current_f[merged] + out_f[rows, following]
+    out_x[rows, following] = (current_x[merged] * current_f[merged] + out_x[rows, following] * out_f[rows, following]) / total_frequency
+    out_y[rows, following] = (current_y[merged] * current_f[merged] + out_y[rows, following] * out_f[rows, following]) / total_frequency
+    out_f[rows, following] = total_frequency
+    out_pooled[rows, following] = True
+
+    saved = ~merged
+    rows = limit_index[saved]
+    out_x[rows, pointer[saved]] = current_x[saved]
+    out_f[rows, pointer[saved]] = current_f[saved]
+    out_y[rows, pointer[saved]] = current_y[saved]
+    out_pooled[rows, pointer[saved]] = current_pooled[saved]
+    pointer[saved] += 1
+
+    pooled_xfy_list = []
+    for row in limit_index:
+        end = pointer[row]
+        pooled_xfy_list.append([out_x[row, end - 1::-1], out_f[row, end - 1::-1], out_y[row, end - 1::-1], out_pooled[row, end - 1::-1]])
+
+    return pooled_xfy_list
+
+
+def save_weighted_xfy(pooled_xfy, output_file):
+    """saves pooled xfy (see pool_xfy), constructs which are not weighted averages are saved as integers"""
 
     with open(output_file, mode='w', encoding='utf-8') as output:
         print('construct' + '\t' + 'frequency' + '\t' + 'avg_constituent_len', file=output)  # header
 
-        for xfy_dict in xfy_list:
-            print(str(xfy_dict['construct']) + '\t' + str(xfy_dict['frequency']) + '\t' + str(xfy_dict['avg_constituent_len']), file=output)
+        for x, f, y, pooled in zip(*[np.asarray(values).tolist() for values in pooled_xfy]):
+            if not pooled:
+                x = int(x)
+            print(str(x) + '\t' + str(f) + '\t' + str(y), file=output)
+
+
+def calculate_weighted_xfy(input_file, output_file, constant):
+    """loads xfy data and calculates weighted average (if applicable), bottom-up,
+       averages are parsed exactly (round trip), i.e. the result equals weighted xfy saved during the pass (XfyAccumulator)"""
+
+    xfy_df = pd.read_csv(input_file, delimiter='\t', float_precision='round_trip')
+
+    if len(xfy_df) == 0:
+        save_weighted_xfy([[], [], [], []], output_file)
+        return
+
+    pooled_xfy = pool_xfy(xfy_df['construct'], xfy_df['frequency'], xfy_df['avg_constituent_len'], [constant])[0]
+    save_weighted_xfy(pooled_xfy, output_file)